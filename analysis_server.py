@@ -0,0 +1,279 @@
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from PIL import Image
+from batch_scanner import _init_worker, _scan_file
+from classifier import create_batch_scorer
+from config import load_config, CONFIG_FILE
+from reporting import json_default
+
+CONFIG_CHECK_INTERVAL = 1.0  # Seconds between checks of config.json's modification time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def _warm_worker():
+    """Worker initializer: everything a first request would otherwise pay for happens at startup."""
+    _init_worker()
+    Image.init()  # Register every PIL format plugin up front
+
+def _ping():
+    return os.getpid()
+
+class ConfigWatcher:
+    """Holds the current configuration and reloads config.json when its modification time changes."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.mtime = self._mtime()
+        self.config = load_config()
+        self.checked = time.monotonic()
+        self.listeners = []
+
+    @staticmethod
+    def _mtime():
+        try:
+            return os.stat(CONFIG_FILE).st_mtime_ns
+        except OSError:
+            return None
+
+    def current(self):
+        with self.lock:
+            if time.monotonic() - self.checked >= CONFIG_CHECK_INTERVAL:
+                self.checked = time.monotonic()
+                mtime = self._mtime()
+                if mtime != self.mtime:
+                    self.mtime = mtime
+                    previous = self.config
+                    self.config = load_config(fallback=previous)
+                    if self.config is not previous:
+                        print("Reloaded config.json.")
+                        for listener in self.listeners:
+                            listener(self.config)
+            return self.config
+
+class AnalysisService:
+    """Warm process pool behind a bounded admission queue.
+
+    At most max_queue submissions are queued or running at once; further ones are
+    refused immediately (HTTP 503) so a burst from the gateway cannot grow memory
+    without limit. Each submission gets the configuration current at admission time.
+    """
+    def __init__(self, config_watcher, workers=None, max_queue=None):
+        self.config_watcher = config_watcher
+        config = config_watcher.current()
+        self.workers = workers or config.get('server_workers') or os.cpu_count() or 1
+        self.max_queue = max_queue or config.get('server_max_queue', 64)
+        self.slots = threading.BoundedSemaphore(self.max_queue)
+        self.in_flight = 0
+        self.completed = 0
+        self.lock = threading.Lock()
+        self.executor = self._start_pool()
+        self.scorer_lock = threading.Lock()
+        self.scorer = None
+        self._configure_scorer(config)
+        config_watcher.listeners.append(self._configure_scorer)
+
+    def _start_pool(self):
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # Start every worker now rather than on the first requests
+        for future in [executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def _replace_pool(self, broken):
+        """Replaces a pool broken by a dead worker (e.g. OOM killed); requests that all saw it break replace it once."""
+        with self.lock:
+            if self.executor is not broken:
+                return  # Another request already replaced it
+        broken.shutdown(wait=False, cancel_futures=True)
+        executor = self._start_pool()  # Outside the lock, so /health and admission are not held up meanwhile
+        with self.lock:
+            if self.executor is broken:
+                self.executor, executor = executor, None
+        if executor:
+            executor.shutdown(wait=False)  # Lost the race to another request's replacement
+
+    def _configure_scorer(self, config):
+        with self.scorer_lock:
+            if self.scorer:
+                self.scorer.close()
+            # Batches of one: a request is answered as soon as its own result is scored
+            self.scorer = create_batch_scorer({**config, "classifier_batch_size": 1}, lambda path, results: None)
+
+    def analyze(self, file_path, input_name=None):
+        """Analyzes one file in the pool; returns (HTTP status, response body) or None when the queue is full."""
+        if not self.slots.acquire(blocking=False):
+            return None
+        with self.lock:
+            self.in_flight += 1
+        try:
+            config = self.config_watcher.current()
+            timeout = config.get('batch_file_timeout', 0)
+            try:
+                executor = self.executor
+                outcome = executor.submit(_scan_file, file_path, config, timeout).result()
+            except BrokenProcessPool:
+                self._replace_pool(executor)
+                return 500, {"error": "Worker process died while analyzing the file"}
+            if outcome["timed_out"]:
+                return 504, {"error": outcome["error"]}
+            if outcome["error"]:
+                return 422, {"error": outcome["error"]}
+            results = outcome["analysis_results"] or {}
+            if input_name:  # Name uploaded members after the upload, not the spool file
+                for member in results.get("members", []):
+                    member["path"] = input_name + member["path"][len(file_path):]
+            with self.scorer_lock:
+                if self.scorer:
+                    self.scorer.submit(input_name or file_path, results)
+                    for member in results.get("members", []):
+                        self.scorer.submit(member["path"], member)
+            results.pop("feature_vector", None)
+            for member in results.get("members", []):
+                member.pop("feature_vector", None)
+            return 200, results
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.completed += 1
+            self.slots.release()
+
+    def status(self):
+        with self.lock:
+            return {"status": "ok", "workers": self.workers, "in_flight": self.in_flight,
+                    "max_queue": self.max_queue, "completed": self.completed}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self.scorer_lock:
+            if self.scorer:
+                self.scorer.close()
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """HTTP API of the service.
+
+    GET  /health                       pool status
+    POST /analyze  {"path": "..."}     analyze a file the service can read
+    POST /analyze?name=upload.jpg      analyze the request body (raw bytes)
+    Responses carry the same result structure as analyze_image / analyze_file.
+    """
+    service = None  # Set on the per-server subclass
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send_json(self, status, body, headers=()):
+        payload = json.dumps(body, default=json_default).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self._send_json(200, self.service.status())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/analyze":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self._send_json(400, {"error": "Invalid Content-Length"})
+            return
+        config = self.service.config_watcher.current()
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            self._analyze_path(self.rfile.read(length))
+        elif length > config.get('server_max_upload_bytes', 1073741824):
+            self.close_connection = True  # The unread body makes the connection unusable
+            self._send_json(413, {"error": "Upload too large"})
+        else:
+            name = parse_qs(url.query).get("name", ["upload"])[0]
+            self._analyze_upload(name, length, config)
+
+    def _analyze_path(self, body):
+        try:
+            file_path = json.loads(body)["path"]
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {"error": 'Expected a JSON body like {"path": "..."}'})
+            return
+        if not os.path.isfile(file_path):
+            self._send_json(404, {"error": f"File not found: {file_path}"})
+            return
+        self._respond(self.service.analyze(file_path))
+
+    def _analyze_upload(self, name, length, config):
+        # Stream the body to a spool file so large uploads never sit in memory whole
+        suffix = os.path.splitext(os.path.basename(name))[1]
+        spool = tempfile.NamedTemporaryFile(dir=config.get('server_spool_dir'), suffix=suffix, delete=False)
+        try:
+            with spool:
+                remaining = length
+                while remaining > 0:
+                    chunk = self.rfile.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    spool.write(chunk)
+                    remaining -= len(chunk)
+            if remaining:
+                self.close_connection = True
+                self._send_json(400, {"error": "Request body shorter than Content-Length"})
+                return
+            self._respond(self.service.analyze(spool.name, input_name=name))
+        finally:
+            os.unlink(spool.name)
+
+    def _respond(self, outcome):
+        if outcome is None:
+            self._send_json(503, {"error": "Analysis queue is full"}, headers=[("Retry-After", "1")])
+        else:
+            self._send_json(*outcome)
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)  # Left behind by a previous run
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+def serve(host=None, port=None, socket_path=None, workers=None):
+    """Runs the analysis service until interrupted; serves on a Unix socket when socket_path is set."""
+    config_watcher = ConfigWatcher()
+    config = config_watcher.current()
+    socket_path = socket_path or config.get('server_socket_path')
+    print("Starting warm worker pool...")
+    service = AnalysisService(config_watcher, workers=workers)
+    handler = type("Handler", (AnalysisRequestHandler,), {"service": service})
+    if socket_path:
+        server = ThreadingUnixHTTPServer(socket_path, handler)
+        print(f"Listening on unix:{socket_path} with {service.workers} workers")
+    else:
+        server = ThreadingHTTPServer((host or config.get('server_host', '127.0.0.1'),
+                                      port or config.get('server_port', 8765)), handler)
+        print(f"Listening on http://{server.server_address[0]}:{server.server_address[1]} "
+              f"with {service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down.")
+    finally:
+        server.server_close()
+        service.close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
\ No newline at end of file
@@ -0,0 +1,254 @@
+import glob
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from dispatcher import analyze_path
+from reporting import BackgroundReportWriter, create_report_sink, default_run_name
+from classifier import create_batch_scorer
+from profiling import RunMetrics
+from scan_journal import ScanJournal
+
+class FileTimeoutError(BaseException):
+    """Raised inside a worker when a single file exceeds its time budget.
+
+    Derives from BaseException so the analyzers' "except Exception" error handling cannot swallow it.
+    """
+
+def _raise_timeout(signum, frame):
+    raise FileTimeoutError()
+
+def _init_worker():
+    # SIGALRM only exists on POSIX; elsewhere files simply run without a timeout
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+def _set_timer(seconds):
+    if hasattr(signal, "setitimer"):
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+
+def _walk_directory(directory, journal=None):
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        if journal is not None:
+            journal.note_directory(root, files)
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+def _expand_input(entry, journal=None):
+    """Expands one directory, file or glob pattern into file paths."""
+    if os.path.isdir(entry):
+        yield from _walk_directory(entry, journal)
+    elif os.path.isfile(entry):
+        yield entry
+    else:
+        for match in sorted(glob.iglob(entry, recursive=True)):
+            if os.path.isdir(match):
+                yield from _walk_directory(match, journal)
+            elif os.path.isfile(match):
+                yield match
+
+def read_manifest(manifest_path):
+    """Yields the entries of a manifest file (one path or glob per line, '#' comments)."""
+    with open(manifest_path, 'r') as f:
+        for line in f:
+            entry = line.strip()
+            if entry and not entry.startswith('#'):
+                yield entry
+
+def iter_input_paths(inputs, manifests=(), journal=None):
+    """Lazily yields every file named by the inputs and manifests, without duplicates.
+
+    With a ScanJournal, directory mtimes are recorded and, in "changed" mode, the completed files
+    of unchanged directories are marked so journal.is_complete() needs no stat for them.
+    """
+    seen = set()
+    entries = list(inputs)
+    for manifest_path in manifests:
+        entries.extend(read_manifest(manifest_path))
+    for entry in entries:
+        for file_path in _expand_input(entry, journal):
+            key = os.path.normpath(file_path)
+            if key not in seen:
+                seen.add(key)
+                yield file_path
+
+def _scan_file(file_path, config, timeout):
+    """Worker entry point: analyzes one file and reports timing and failures."""
+    start = time.perf_counter()
+    outcome = {"input_file": file_path, "size": 0, "analysis_results": None,
+               "error": None, "timed_out": False}
+    try:
+        stat = os.stat(file_path)
+        outcome["size"] = stat.st_size
+        outcome["mtime_ns"] = stat.st_mtime_ns  # Lets a scan journal tell later whether the file changed
+        if timeout:
+            _set_timer(timeout)
+        try:
+            outcome["analysis_results"] = analyze_path(file_path, config)
+        finally:
+            if timeout:
+                _set_timer(0)
+    except FileTimeoutError:
+        outcome["timed_out"] = True
+        outcome["error"] = f"Timed out after {timeout} seconds"
+    except Exception as e:
+        outcome["error"] = str(e)
+    outcome["elapsed"] = time.perf_counter() - start
+    return outcome
+
+def _worker_failure(file_path, error):
+    """Outcome of a file whose worker process died; journaled as failed, so it is retried on resume."""
+    outcome = {"input_file": file_path, "size": 0, "analysis_results": None, "error": error, "timed_out": False}
+    try:
+        stat = os.stat(file_path)
+        outcome["size"] = stat.st_size
+        outcome["mtime_ns"] = stat.st_mtime_ns
+    except OSError:
+        pass
+    return outcome
+
+def _collect(future, file_path, summary, submit, metrics, journal=None):
+    try:
+        outcome = future.result()
+    except Exception as e:
+        # The worker process itself died (e.g. killed by the OOM killer), or the pool broke under it
+        outcome = _worker_failure(file_path, f"Worker process failed: {e or type(e).__name__}")
+    if journal:
+        journal.record(outcome)
+    summary["files"] += 1
+    summary["bytes"] += outcome["size"]
+    if outcome["timed_out"]:
+        summary["timed_out"] += 1
+        print(f"Timeout: {outcome['input_file']}: {outcome['error']}")
+    elif outcome["error"]:
+        summary["failed"] += 1
+        print(f"Error analyzing {outcome['input_file']}: {outcome['error']}")
+    else:
+        cache_stats = outcome["analysis_results"].get("cache", {})
+        summary["cache_hits"] += cache_stats.get("hits", 0)
+        summary["cache_misses"] += cache_stats.get("misses", 0)
+        if metrics:
+            metrics.add_profile(outcome["analysis_results"].get("profile"))
+        # Container members become report rows of their own, named "container!member"
+        members = outcome["analysis_results"].pop("members", [])
+        submit(outcome["input_file"], outcome["analysis_results"])
+        for member in members:
+            summary["members"] += 1
+            cache_stats = member.get("cache", {})
+            summary["cache_hits"] += cache_stats.get("hits", 0)
+            summary["cache_misses"] += cache_stats.get("misses", 0)
+            if metrics:
+                metrics.add_profile(member.get("profile"))
+            submit(member.pop("path"), member)
+
+def _checkpoint(journal, scorer, report_writer):
+    """Commits the journal once every result it lists as completed is durably in the reports."""
+    if scorer:
+        scorer.checkpoint()
+    report_writer.flush()
+    journal.commit()
+
+def run_batch(inputs, config, manifests=(), workers=None, max_in_flight=None, timeout=None,
+              journal_path=None, journal_mode="new"):
+    """Analyzes every input file across a process pool and returns a throughput summary.
+
+    With a journal (journal_path or config['scan_journal_path']), progress is checkpointed
+    so that journal_mode "resume" or "changed" (see ScanJournal) continues an interrupted
+    or earlier run, appending to the same report set.
+    """
+    workers = workers or config.get('batch_workers') or os.cpu_count() or 1
+    max_in_flight = max_in_flight or config.get('batch_max_in_flight') or workers * 4
+    if timeout is None:
+        timeout = config.get('batch_file_timeout', 0)
+
+    summary = {"files": 0, "members": 0, "skipped": 0, "failed": 0, "timed_out": 0, "bytes": 0, "cache_hits": 0,
+               "cache_misses": 0}
+    start = time.perf_counter()
+    metrics = RunMetrics() if config.get('profiling') else None
+    journal_path = journal_path or config.get('scan_journal_path')
+    journal = ScanJournal(journal_path, config, journal_mode) if journal_path else None
+    run_name = journal.run_name if journal else None
+    if journal and run_name is None:
+        run_name = default_run_name()
+        journal.start(run_name)
+    report_writer = BackgroundReportWriter(create_report_sink(config, run_name), metrics=metrics)
+    # Feature vectors are scored in batches before their reports are written
+    scorer = create_batch_scorer(config, report_writer.submit)
+    submit = scorer.submit if scorer else report_writer.submit
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    pending = {}  # future -> file path
+    try:
+        for file_path in iter_input_paths(inputs, manifests, journal):
+            if journal and journal.is_complete(file_path):
+                summary["skipped"] += 1
+                continue
+            # Bound the queue so huge directory trees are never fully materialized as futures
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _collect(future, pending.pop(future), summary, submit, metrics, journal)
+                if journal and journal.checkpoint_due():
+                    _checkpoint(journal, scorer, report_writer)
+            try:
+                pending[executor.submit(_scan_file, file_path, config, timeout)] = file_path
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM killed) and took the pool down; every file still in
+                # flight fails with it (the culprit is among them), then a fresh pool carries on
+                print("A worker process died; restarting the process pool.")
+                for future in wait(pending).done:
+                    _collect(future, pending[future], summary, submit, metrics, journal)
+                pending.clear()
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+                pending[executor.submit(_scan_file, file_path, config, timeout)] = file_path
+        for future in wait(pending).done:
+            _collect(future, pending[future], summary, submit, metrics, journal)
+        if journal:
+            _checkpoint(journal, scorer, report_writer)
+            journal.finish()
+    finally:
+        executor.shutdown(cancel_futures=True)
+        # Also on errors and Ctrl-C, so buffered reports are written and the writer thread stops
+        if scorer:
+            scorer.close()
+        report_writer.close()
+        if journal:
+            # Closing without a commit drops the rows since the last checkpoint; those files are redone
+            journal.close()
+    if scorer:
+        summary["classifier_scored"] = scorer.scored
+        summary["suspicious"] = scorer.suspicious
+
+    elapsed = time.perf_counter() - start
+    summary["elapsed_seconds"] = elapsed
+    summary["files_per_second"] = summary["files"] / elapsed if elapsed > 0 else 0.0
+    summary["mb_per_second"] = summary["bytes"] / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+    if metrics:
+        summary["stage_metrics"] = metrics.summary()
+        metrics_path = config.get('metrics_path') or os.path.join(config.get('report_output_dir', 'reports'),
+                                                                  'metrics.prom')
+        metrics.write_prometheus(metrics_path)
+        print(f"Stage metrics saved to: {metrics_path}")
+    print_summary(summary)
+    return summary
+
+def print_summary(summary):
+    print("\n--- Batch Summary ---")
+    print(f"Files analyzed: {summary['files']} ({summary['failed']} failed, {summary['timed_out']} timed out)")
+    if summary.get('skipped'):
+        print(f"Skipped (completed in an earlier run): {summary['skipped']}")
+    if summary.get('members'):
+        print(f"Container members analyzed: {summary['members']}")
+    print(f"Data analyzed: {summary['bytes'] / (1024 * 1024):.2f} MB in {summary['elapsed_seconds']:.2f} s")
+    print(f"Throughput: {summary['files_per_second']:.2f} files/s, {summary['mb_per_second']:.2f} MB/s")
+    if summary.get('classifier_scored'):
+        print(f"Classifier: {summary['suspicious']} of {summary['classifier_scored']} images suspicious")
+    if summary['cache_hits'] or summary['cache_misses']:
+        print(f"Result cache: {summary['cache_hits']} hits, {summary['cache_misses']} misses")
+    if summary.get('stage_metrics'):
+        print("Time by stage (wall / CPU seconds):")
+        ranked = sorted(summary['stage_metrics'].items(), key=lambda item: item[1]['wall_seconds'], reverse=True)
+        for name, stage in ranked:
+            print(f"  {name:<40} {stage['wall_seconds']:9.3f} / {stage['cpu_seconds']:9.3f} ({stage['count']} calls)")
\ No newline at end of file
@@ -0,0 +1,48 @@
+import time
+from collections import Counter
+import numpy as np
+from statistical_analysis import calculate_histogram, calculate_channel_histograms, calculate_chi_square
+
+# Previous Counter/list-comprehension implementations, kept here only for comparison
+def legacy_histogram(data):
+    return Counter(data)
+
+def legacy_chi_square(observed, expected):
+    return np.sum([(o - e)**2 / e for o, e in zip(observed, expected)])
+
+def _best_of(func, *args, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmarks(size_mb=4, seed=0):
+    rng = np.random.default_rng(seed)
+    raw = rng.bytes(size_mb * 1024 * 1024)
+    side = int((size_mb * 1024 * 1024 / 3) ** 0.5)
+    pixels = rng.integers(0, 256, (side, side, 3), dtype=np.uint8)
+    observed = calculate_histogram(raw)
+    expected = np.full(256, len(raw) / 256.0)
+
+    cases = [
+        ("byte histogram", lambda: legacy_histogram(raw), lambda: calculate_histogram(raw)),
+        ("channel histograms", lambda: [legacy_histogram(pixels[:, :, c].flatten()) for c in range(3)],
+         lambda: calculate_channel_histograms(pixels)),
+        ("chi-square (256 bins)", lambda: legacy_chi_square(observed, expected),
+         lambda: calculate_chi_square(observed, expected)),
+    ]
+    print(f"Benchmarking statistical primitives on {size_mb} MB inputs")
+    results = {}
+    for name, legacy, vectorized in cases:
+        legacy_time = _best_of(legacy)
+        vectorized_time = _best_of(vectorized)
+        results[name] = {"legacy_seconds": legacy_time, "vectorized_seconds": vectorized_time,
+                         "speedup": legacy_time / vectorized_time}
+        print(f"{name:>22}: legacy {legacy_time * 1000:9.2f} ms, vectorized {vectorized_time * 1000:8.2f} ms"
+              f" ({legacy_time / vectorized_time:.1f}x)")
+    return results
+
+if __name__ == "__main__":
+    run_benchmarks()
\ No newline at end of file
@@ -0,0 +1,301 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+from PIL import Image
+from config import DEFAULT_CONFIG
+from detection_methods import (image_detection_methods, image_detector_specs, file_detection_methods,
+                               file_detector_specs, create_streaming_detector)
+from detector_registry import ProductContext, infer_spec, suspicion_score
+from dispatcher import analyze_path
+from feature_extraction import FileFeatureAccumulator, extract_image_features
+from file_analyzer import build_file_products
+from image_analyzer import build_image_products
+from reporting import json_default
+
+try:
+    import resource
+except ImportError:  # POSIX only; peak RSS is not reported without it
+    resource = None
+
+DEFAULT_RESOLUTIONS = [256, 1024, 2048]
+DEFAULT_CHANNELS = [1, 3]
+DEFAULT_PAYLOAD_RATES = [0.0, 0.1, 0.5, 1.0]
+DEFAULT_FILE_SIZES_MB = [1, 16]
+CHUNK_SIZE = 1024 * 1024
+
+# Synthetic corpus generation
+def generate_cover(size, channels, seed=0):
+    """Deterministic smooth cover image (gradients plus mild sensor noise), shape (size, size, channels)."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size]
+    base = 128 + 60 * np.sin(x / (size / 7.0)) + 40 * np.cos(y / (size / 5.0))
+    noise = rng.normal(0, 1.5, (size, size, channels))
+    pixels = base[:, :, None] + noise + np.arange(channels) * 12
+    return np.clip(np.round(pixels), 0, 255).astype(np.uint8)
+
+def embed_lsb(pixels, rate, seed=1):
+    """LSB replacement of a random message into a 'rate' fraction of all samples."""
+    if rate <= 0:
+        return pixels
+    rng = np.random.default_rng(seed)
+    mask = rng.random(pixels.shape) < rate
+    message = rng.integers(0, 2, pixels.shape, dtype=np.uint8)
+    return np.where(mask, (pixels & 0xFE) | message, pixels).astype(np.uint8)
+
+def generate_image_corpus(resolutions, channels_list, payload_rates):
+    """Yields (case_name, pixels, payload_rate) for every resolution, channel count and payload rate."""
+    for size in resolutions:
+        for channels in channels_list:
+            cover = generate_cover(size, channels)
+            for rate in payload_rates:
+                yield f"{size}x{size}x{channels}/rate{rate}", embed_lsb(cover, rate), rate
+
+def generate_file_corpus(sizes_mb, seed=0):
+    """Yields (case_name, bytes) of half-structured, half-random content at each size."""
+    rng = np.random.default_rng(seed)
+    for size_mb in sizes_mb:
+        size = size_mb * 1024 * 1024
+        structured = np.tile(np.arange(256, dtype=np.uint8), size // 512 + 1)[:size // 2]
+        yield f"{size_mb}MB", structured.tobytes() + rng.bytes(size - size // 2)
+
+def _to_image(pixels):
+    return Image.fromarray(pixels[:, :, 0] if pixels.shape[-1] == 1 else pixels)
+
+# Measurement helpers
+def _percentiles(samples):
+    values = np.asarray(samples) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean()),
+    }
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+@contextlib.contextmanager
+def _quiet():
+    """Detectors print progress; keep it out of the measurements' output."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+def _measure(setup, func, repeat):
+    """Times func(*setup()) repeat times, then once more under tracemalloc for its peak allocation.
+
+    setup() runs outside the timed region, so shared products are not charged to the detector.
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        arguments = setup()
+        start = time.perf_counter()
+        result = func(*arguments)
+        timings.append(time.perf_counter() - start)
+    arguments = setup()
+    tracemalloc.start()
+    func(*arguments)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stats = _percentiles(timings)
+    stats["peak_alloc_mb"] = peak / (1024 * 1024)
+    return stats, result
+
+# Benchmarks
+def benchmark_image_detectors(corpus, config, repeat):
+    results = {}
+    for case_name, pixels, rate in corpus:
+        image = _to_image(pixels)
+        megapixels = pixels.shape[0] * pixels.shape[1] / 1e6
+        # Shared products are timed once each; detectors below receive them precomputed
+        for product_name in build_image_products(image, "", config):
+            if product_name in ("config", "source_path", "dct_coefficients", "file_structure"):
+                continue
+
+            def setup():
+                products = ProductContext(build_image_products(image, "", config))
+                if product_name != "pixels":
+                    products.values["pixels"] = pixels
+                return (products,)
+
+            stats, _ = _measure(setup, lambda products: products.get(product_name), repeat)
+            results[f"product/{product_name}/{case_name}"] = stats
+
+        for method_name, method_func in image_detection_methods.items():
+            spec = image_detector_specs.get(method_name) or infer_spec(
+                method_func, build_image_products(image, "", config))
+            if "dct_coefficients" in spec.requires or "file_structure" in spec.requires:
+                continue  # Needs an encoded file; measured end to end below
+
+            def setup():
+                products = ProductContext(build_image_products(image, case_name.replace('/', '_'), config))
+                products.values["pixels"] = pixels
+                return (extract_image_features(image, pixels=pixels), products.arguments(spec))
+
+            stats, result = _measure(setup, lambda features, arguments: method_func(image, features, **arguments),
+                                     repeat)
+            stats["megapixels_per_second"] = megapixels / (stats["p50_ms"] / 1000.0 or float('inf'))
+            stats["suspicion_score"] = suspicion_score(result)
+            stats["payload_rate"] = rate
+            results[f"detector/{method_name}/{case_name}"] = stats
+    return results
+
+def benchmark_file_detectors(corpus, config, repeat):
+    results = {}
+    for case_name, data in corpus:
+        def accumulate(accumulator):
+            for offset in range(0, len(data), CHUNK_SIZE):
+                accumulator.update(data[offset:offset + CHUNK_SIZE])
+            return accumulator
+
+        # The feature pass produces the shared byte counts, so it is timed as a product
+        stats, accumulator = _measure(lambda: (FileFeatureAccumulator(),), accumulate, repeat)
+        results[f"product/byte_counts/{case_name}"] = stats
+        features = accumulator.finalize()
+        for method_name, method_func in file_detection_methods.items():
+            spec = file_detector_specs.get(method_name) or infer_spec(
+                method_func, build_file_products(accumulator, config))
+
+            def setup():
+                products = ProductContext(build_file_products(accumulator, config, file=io.BytesIO(data)))
+                return (create_streaming_detector(method_name), products.arguments(spec))
+
+            def run(detector, arguments):
+                for offset in range(0, len(data), CHUNK_SIZE):
+                    detector.update(data[offset:offset + CHUNK_SIZE])
+                return detector.finalize(features, **arguments)
+
+            stats, result = _measure(setup, run, repeat)
+            stats["mb_per_second"] = len(data) / (1024 * 1024) / (stats["p50_ms"] / 1000.0 or float('inf'))
+            results[f"detector/{method_name}/{case_name}"] = stats
+    return results
+
+def benchmark_end_to_end(paths, config, repeat):
+    """Times the full analyze_path route (open, sniff, decode, features, detectors) per file."""
+    timings = []
+    total_bytes = 0
+    for _ in range(repeat):
+        for path in paths:
+            start = time.perf_counter()
+            analyze_path(path, config)
+            timings.append(time.perf_counter() - start)
+            total_bytes += os.path.getsize(path)
+    elapsed = sum(timings)
+    stats = _percentiles(timings)
+    stats["files_per_second"] = len(timings) / elapsed if elapsed else 0.0
+    stats["mb_per_second"] = total_bytes / (1024 * 1024) / elapsed if elapsed else 0.0
+    return stats
+
+def run_benchmarks(resolutions=DEFAULT_RESOLUTIONS, channels_list=DEFAULT_CHANNELS,
+                   payload_rates=DEFAULT_PAYLOAD_RATES, file_sizes_mb=DEFAULT_FILE_SIZES_MB, repeat=5):
+    config = {**DEFAULT_CONFIG,
+              "default_image_methods": list(image_detection_methods),
+              "default_file_methods": list(file_detection_methods),
+              "result_cache_path": None, "bit_plane_artifacts": False}
+    results = {}
+    with _quiet():
+        results.update(benchmark_image_detectors(
+            generate_image_corpus(resolutions, channels_list, payload_rates), config, repeat))
+        results.update(benchmark_file_detectors(generate_file_corpus(file_sizes_mb), config, repeat))
+
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            image_paths = {}
+            for case_name, pixels, rate in generate_image_corpus(resolutions, channels_list, payload_rates[-1:]):
+                path = os.path.join(corpus_dir, case_name.replace('/', '_') + ".png")
+                _to_image(pixels).save(path, compress_level=1)
+                image_paths.setdefault(case_name.split('/')[0], []).append(path)
+            for group, paths in image_paths.items():
+                results[f"end_to_end/analyze_image/{group}"] = benchmark_end_to_end(paths, config, repeat)
+
+            # JPEG-only method sets read the DCT coefficients and never decode pixels
+            dct_config = {**config, "default_image_methods": [
+                name for name, spec in image_detector_specs.items() if "dct_coefficients" in spec.requires]}
+            jpeg_paths = {}
+            for case_name, pixels, rate in generate_image_corpus(resolutions, channels_list, payload_rates[:1]):
+                path = os.path.join(corpus_dir, case_name.replace('/', '_') + ".jpg")
+                _to_image(pixels).save(path, quality=85)
+                jpeg_paths.setdefault(case_name.split('/')[0], []).append(path)
+            for group, paths in jpeg_paths.items():
+                results[f"end_to_end/analyze_jpeg_dct/{group}"] = benchmark_end_to_end(paths, dct_config, repeat)
+            for case_name, data in generate_file_corpus(file_sizes_mb):
+                path = os.path.join(corpus_dir, case_name + ".bin")
+                with open(path, 'wb') as f:
+                    f.write(data)
+                results[f"end_to_end/analyze_file/{case_name}"] = benchmark_end_to_end([path], config, repeat)
+
+    return {
+        "metadata": {
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "peak_rss_mb": _peak_rss_mb(),
+        },
+        "results": results,
+    }
+
+def compare_to_baseline(current, baseline, tolerance, min_delta_ms=0.5):
+    """Returns [(name, baseline_ms, current_ms)] for cases whose median latency regressed beyond tolerance.
+
+    Slowdowns smaller than min_delta_ms are ignored; sub-millisecond cases are dominated by timer noise.
+    """
+    regressions = []
+    for name, stats in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if (previous and stats["p50_ms"] > previous["p50_ms"] * (1 + tolerance)
+                and stats["p50_ms"] - previous["p50_ms"] >= min_delta_ms):
+            regressions.append((name, previous["p50_ms"], stats["p50_ms"]))
+    return regressions
+
+def print_results(report):
+    for name, stats in report["results"].items():
+        print(f"{name:<60} p50 {stats['p50_ms']:10.2f} ms  p90 {stats['p90_ms']:10.2f} ms")
+    if report['metadata']['peak_rss_mb'] is not None:
+        print(f"Peak RSS: {report['metadata']['peak_rss_mb']:.1f} MB")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Steganalysis Suite benchmarks")
+    parser.add_argument("--resolutions", type=int, nargs="+", default=DEFAULT_RESOLUTIONS)
+    parser.add_argument("--channels", type=int, nargs="+", default=DEFAULT_CHANNELS)
+    parser.add_argument("--payload-rates", type=float, nargs="+", default=DEFAULT_PAYLOAD_RATES)
+    parser.add_argument("--file-sizes-mb", type=int, nargs="+", default=DEFAULT_FILE_SIZES_MB)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the machine-readable results to this JSON file")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed median slowdown (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.resolutions, args.channels, args.payload_rates, args.file_sizes_mb, args.repeat)
+    print_results(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4, default=json_default)
+        print(f"Benchmark results saved to: {args.output}")
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance, args.min_delta_ms)
+        for name, before, after in regressions:
+            print(f"Regression: {name}: {before:.2f} ms -> {after:.2f} ms")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,167 @@
+import argparse
+import sys
+import numpy as np
+from PIL import Image
+from feature_extraction import extract_feature_vector, FEATURE_VECTOR_LENGTH, FEATURE_VECTOR_VERSION
+from feature_store import FeatureStore, is_feature_store, load_feature_store
+from utils import normalize_pixels
+
+class LogisticRegressionModel:
+    """Standardized logistic regression over feature vectors, scored in batches with NumPy."""
+    def __init__(self, weights, bias, mean, scale):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+
+    def decision_function(self, vectors):
+        return ((np.asarray(vectors, dtype=np.float64) - self.mean) / self.scale) @ self.weights + self.bias
+
+    def predict_proba(self, vectors):
+        """Probability that each row of an (N, FEATURE_VECTOR_LENGTH) matrix is stego."""
+        return 1.0 / (1.0 + np.exp(-np.clip(self.decision_function(vectors), -500, 500)))
+
+    def save(self, path):
+        with open(path, 'wb') as f:  # An open file keeps np.savez from appending '.npz'
+            np.savez(f, weights=self.weights, bias=self.bias, mean=self.mean, scale=self.scale,
+                     feature_version=FEATURE_VECTOR_VERSION)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if (int(data["feature_version"]) != FEATURE_VECTOR_VERSION
+                    or data["weights"].shape != (FEATURE_VECTOR_LENGTH,)):
+                raise ValueError(f"{path} was trained on a different feature layout; retrain it")
+            return cls(data["weights"], data["bias"], data["mean"], data["scale"])
+
+def train_logistic_regression(vectors, labels, l2=1e-3, iterations=2000, learning_rate=0.5):
+    """Fits a LogisticRegressionModel by full-batch gradient descent on standardized features."""
+    x = np.asarray(vectors, dtype=np.float64)
+    y = np.asarray(labels, dtype=np.float64)
+    mean = x.mean(axis=0)
+    scale = x.std(axis=0)
+    scale[scale < 1e-12] = 1.0  # Constant features get weight decay only
+    x = (x - mean) / scale
+    weights = np.zeros(x.shape[1])
+    bias = 0.0
+    for _ in range(iterations):
+        error = 1.0 / (1.0 + np.exp(-np.clip(x @ weights + bias, -500, 500))) - y
+        weights -= learning_rate * (x.T @ error / len(y) + l2 * weights)
+        bias -= learning_rate * error.mean()
+    return LogisticRegressionModel(weights, bias, mean, scale)
+
+class BatchScorer:
+    """Collects analysis results and scores their feature vectors many files at a time.
+
+    Each result's 'feature_vector' is removed, appended to the feature store when one is
+    configured and, when a model is loaded, scored in batches of batch_size: one matrix
+    product per batch instead of one per file. Scored results gain a 'classifier' entry
+    whose 'suspicious' flag applies suspicious_threshold. Every result is then passed to
+    emit(input_file, analysis_results) in arrival order.
+    """
+    def __init__(self, emit, model=None, feature_store=None, threshold=0.7, batch_size=256):
+        self.emit = emit
+        self.model = model
+        self.feature_store = feature_store
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.pending = []
+        self.scored = 0
+        self.suspicious = 0
+
+    def submit(self, input_file, analysis_results):
+        vector = analysis_results.pop("feature_vector", None)
+        if vector is not None and self.feature_store is not None:
+            self.feature_store.append(input_file, vector)
+        if self.model is None or (vector is None and not self.pending):
+            self.emit(input_file, analysis_results)
+            return
+        self.pending.append((input_file, analysis_results, vector))  # Keeps report order
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        rows = [vector for _, _, vector in self.pending if vector is not None]
+        scores = iter(self.model.predict_proba(np.stack(rows)) if rows else [])
+        for input_file, analysis_results, vector in self.pending:
+            if vector is not None:
+                score = float(next(scores))
+                suspicious = score >= self.threshold
+                analysis_results["classifier"] = {"score": score, "suspicious": suspicious}
+                self.scored += 1
+                self.suspicious += suspicious
+            self.emit(input_file, analysis_results)
+        self.pending = []
+
+    def checkpoint(self):
+        """Emits the pending results and makes the stored feature vectors durable."""
+        if self.pending:
+            self.flush()
+        if self.feature_store is not None:
+            self.feature_store.flush()
+
+    def close(self):
+        if self.pending:
+            self.flush()
+        if self.feature_store is not None:
+            self.feature_store.close()
+
+def feature_vectors_enabled(config):
+    return bool(config.get('classifier_model_path') or config.get('feature_store_path'))
+
+def create_batch_scorer(config, emit):
+    """BatchScorer for the configured model and feature store, or None when neither is set."""
+    if not feature_vectors_enabled(config):
+        return None
+    model = None
+    if config.get('classifier_model_path'):
+        try:
+            model = LogisticRegressionModel.load(config['classifier_model_path'])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading classifier model: {e}")
+    feature_store = FeatureStore(config['feature_store_path']) if config.get('feature_store_path') else None
+    return BatchScorer(emit, model, feature_store, config.get('suspicious_threshold', 0.7),
+                       config.get('classifier_batch_size', 256))
+
+def _load_vectors(inputs):
+    """Feature vectors of the images named by inputs (files, directories, globs or feature stores)."""
+    from batch_scanner import iter_input_paths  # batch_scanner imports this module
+    vectors = []
+    for entry in inputs:
+        if is_feature_store(entry):
+            vectors.extend(np.asarray(load_feature_store(entry)[0]))
+            continue
+        for path in iter_input_paths([entry]):
+            try:
+                with Image.open(path) as img:
+                    vectors.append(extract_feature_vector(normalize_pixels(img)))
+            except Exception as e:
+                print(f"Skipping {path}: {e}")
+    return vectors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the steganalysis classifier")
+    parser.add_argument("--cover", nargs="+", required=True,
+                        help="Clean images: files, directories, globs or feature stores")
+    parser.add_argument("--stego", nargs="+", required=True,
+                        help="Stego images: files, directories, globs or feature stores")
+    parser.add_argument("--output", required=True, help="Where to save the trained model (.npz)")
+    parser.add_argument("--l2", type=float, default=1e-3, help="L2 regularization strength")
+    args = parser.parse_args(argv)
+
+    cover = _load_vectors(args.cover)
+    stego = _load_vectors(args.stego)
+    if not cover or not stego:
+        print("Error: need at least one cover and one stego image.")
+        return 1
+    vectors = np.stack(cover + stego)
+    labels = np.concatenate([np.zeros(len(cover)), np.ones(len(stego))])
+    model = train_logistic_regression(vectors, labels, l2=args.l2)
+    accuracy = float(((model.predict_proba(vectors) >= 0.5) == labels).mean())
+    model.save(args.output)
+    print(f"Trained on {len(cover)} cover and {len(stego)} stego images (training accuracy {accuracy:.3f}).")
+    print(f"Model saved to: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
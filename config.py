@@ -5,12 +5,50 @@ DEFAULT_CONFIG = {
     "default_image_methods": ["lsb_analysis"],
     "default_file_methods": [],
     "report_output_dir": "reports",
-    "suspicious_threshold": 0.7  # Example threshold
+    "report_format": "jsonl",  # Batch reports: "jsonl", "json" (one file per input), "csv" or "parquet"
+    "suspicious_threshold": 0.7,  # Example threshold
+    "short_circuit": False,  # Stop running detectors once one reaches suspicious_threshold
+    "batch_workers": None,  # None uses os.cpu_count()
+    "batch_max_in_flight": None,  # None keeps 4 files queued per worker
+    "batch_file_timeout": 300,  # Seconds per file, 0 disables the timeout
+    "file_chunk_size": 1048576,  # Bytes read per chunk when streaming non-image files
+    "profiling": False,  # Record per-stage wall/CPU time and memory for every file
+    "metrics_path": None,  # Prometheus text file for run metrics; None writes report_output_dir/metrics.prom
+    "result_cache_path": None,  # e.g. "cache/results.sqlite" to reuse results across scans
+    "result_cache_max_bytes": 536870912,  # Least recently used results are evicted above this size
+    "lsb_tile_size": 64,  # Tile edge in pixels for tiled_lsb_analysis
+    "lsb_top_k": 5,  # Number of suspicious tiles reported
+    "lsb_heatmap_size": 32,  # Maximum heatmap cells per side in the report
+    "bit_planes": [0],  # Bit planes extracted by visual_lsb_analysis (0 is the LSB)
+    "bit_plane_channels": None,  # None extracts every channel
+    "bit_plane_artifacts": False,  # Save the extracted planes as PNGs under report_output_dir
+    "max_frames": None,  # Frames analyzed per animated GIF / multi-page TIFF; None analyzes every frame
+    "screening_max_pixels": 16777216,  # Larger single-frame JPEGs are screened at reduced size first; None disables
+    "screening_threshold": 0.2,  # Screening suspicion_score that triggers the full-resolution pass
+    "dct_max_pixels": 4194304,  # Larger JPEGs skip the slow DCT coefficient reader (JSteg/F5); None disables
+    "classifier_model_path": None,  # Model trained with classifier.py; images scoring >= suspicious_threshold are flagged
+    "feature_store_path": None,  # e.g. "features/scan.f32": memory-mapped store of every image's feature vector
+    "classifier_batch_size": 256,  # Feature vectors scored per batch
+    "server_host": "127.0.0.1",  # Service mode (--serve) listens here unless a Unix socket is given
+    "server_port": 8765,
+    "server_socket_path": None,  # e.g. "/run/steganalysis.sock" to serve over a Unix socket instead
+    "server_workers": None,  # Warm worker processes; None uses os.cpu_count()
+    "server_max_queue": 64,  # Submissions queued or running at once; more are refused with 503
+    "server_max_upload_bytes": 1073741824,  # Largest file accepted as a request body
+    "server_spool_dir": None,  # Where uploaded bytes are written for analysis; None uses the system temp dir
+    "container_max_depth": 3,  # Nesting levels of ZIP/TAR/PDF members analyzed; 0 treats containers as opaque
+    "container_max_members": 10000,  # Members analyzed per scanned file, across all nesting levels
+    "container_max_member_bytes": 268435456,  # Larger members are skipped (they are read into memory)
+    "container_max_total_bytes": 1073741824,  # Decompressed bytes read per scanned file; guards against zip bombs
+    "structure_max_metadata_bytes": 262144,  # structure_analysis flags larger ancillary chunks / APPn segments
+    "scan_journal_path": None,  # e.g. "state/scan.sqlite" to record batch progress for --resume / --changed-only
+    "journal_checkpoint_seconds": 30  # How often completed files are committed to the scan journal
 }
 
 CONFIG_FILE = "config.json"
 
-def load_config():
+def load_config(fallback=None):
+    """Reads config.json merged over the defaults; a file that fails to parse yields fallback (or the defaults)."""
     if os.path.exists(CONFIG_FILE):
         try:
             with open(CONFIG_FILE, 'r') as f:
@@ -18,6 +56,9 @@ def load_config():
                 # Merge with defaults to ensure all keys exist
                 return {**DEFAULT_CONFIG, **config}
         except json.JSONDecodeError:
+            if fallback is not None:
+                print("Error decoding config.json. Keeping the previous configuration.")
+                return fallback
             print("Error decoding config.json. Using default configuration.")
             return DEFAULT_CONFIG
     else:
@@ -0,0 +1,172 @@
+import lzma
+import mmap
+import re
+import tarfile
+import zipfile
+import zlib
+
+MEMBER_SEPARATOR = "!"  # Members are reported as "outer.zip!dir/inner.tar!image.png"
+TAR_FORMATS = {'tar', 'gzip', 'bzip2', 'xz'}  # Compressed formats are tried as .tar.gz / .tar.bz2 / .tar.xz
+READ_CHUNK_SIZE = 1024 * 1024
+
+# PDF image streams: a stream keyword after a dictionary that applies DCTDecode alone
+_PDF_STREAM = re.compile(rb'>>\s*stream(?:\r\n|\n|\r)')
+_PDF_OBJECT = re.compile(rb'(\d+)\s+\d+\s+obj\b')
+_PDF_DCT_FILTER = re.compile(rb'/Filter\s*(?:/DCTDecode|\[\s*/DCTDecode\s*\])')
+_PDF_LENGTH = re.compile(rb'/Length\s+(\d+)(?!\s+\d+\s+R)')
+PDF_DICTIONARY_WINDOW = 4096  # Bytes searched backwards from 'stream' for the object's dictionary
+# Corrupt or unsupported data (bad CRC, broken deflate/LZMA stream, unknown compression method, truncation)
+READ_ERRORS = (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError, zlib.error, lzma.LZMAError,
+               NotImplementedError, RuntimeError)
+
+class ContainerLimits:
+    """Depth, size and member-count budget shared by every container nested in one scanned file.
+
+    Members are only ever held in memory, so the byte budget bounds both memory use and
+    the work a zip bomb can cause; once it or the member budget is spent, the remaining
+    members are skipped.
+    """
+    def __init__(self, config):
+        self.max_depth = config.get('container_max_depth', 3)
+        self.max_member_bytes = config.get('container_max_member_bytes', 268435456)
+        self.remaining_bytes = config.get('container_max_total_bytes', 1073741824)
+        self.remaining_members = config.get('container_max_members', 10000)
+        self.exhausted = False
+
+    def admit(self, name, declared_size=None):
+        """Whether another member (of declared_size bytes, when known) may still be read."""
+        if self.remaining_members <= 0:
+            if not self.exhausted:
+                print("Container member limit reached; skipping the remaining members.")
+                self.exhausted = True
+            return False
+        if declared_size is not None and declared_size > min(self.max_member_bytes, self.remaining_bytes):
+            print(f"Skipping container member {name}: {declared_size} bytes exceeds the size limit")
+            return False
+        return True
+
+    def read(self, name, stream):
+        """Reads a member within the limits; returns its bytes, or None when it was too large."""
+        limit = min(self.max_member_bytes, self.remaining_bytes)
+        chunks = []
+        size = 0
+        # Declared sizes can lie, so the decompressed stream itself is capped
+        for chunk in iter(lambda: stream.read(min(READ_CHUNK_SIZE, limit + 1 - size)), b''):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                print(f"Skipping container member {name}: exceeds the size limit")
+                return None
+        self.remaining_members -= 1
+        self.remaining_bytes -= size
+        return b''.join(chunks)
+
+def is_container(file_format):
+    return file_format in ('zip', 'pdf') or file_format in TAR_FORMATS
+
+def iter_container_members(f, file_format, limits):
+    """Yields (member name, member bytes, error) for the files inside a ZIP (including DOCX/XLSX/ODT
+    and other ZIP-based formats), TAR (optionally gzip/bzip2/xz compressed) or PDF container.
+
+    Members are read one at a time straight from the open file; nothing is extracted to disk.
+    A member that cannot be read is yielded with bytes None and the error message, and the
+    remaining members are still read (a compressed tar stream cannot continue past one).
+    """
+    f.seek(0)
+    try:
+        if file_format == 'zip':
+            yield from _zip_members(f, limits)
+        elif file_format in TAR_FORMATS:
+            yield from _tar_members(f, limits)
+        elif file_format == 'pdf':
+            yield from _pdf_members(f, limits)
+    except READ_ERRORS as e:
+        # A lone .gz/.bz2/.xz file is not a tar archive and simply has no members
+        if file_format in ('zip', 'tar', 'pdf'):
+            print(f"Error reading container: {e}")
+    finally:
+        f.seek(0)
+
+def _zip_members(f, limits):
+    with zipfile.ZipFile(f) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            if info.flag_bits & 0x1:
+                print(f"Skipping encrypted container member {info.filename}")
+                continue
+            if not limits.admit(info.filename, info.file_size):
+                continue
+            try:
+                with archive.open(info) as stream:
+                    data = limits.read(info.filename, stream)
+            except READ_ERRORS as e:
+                yield _failed_member(info.filename, e, limits)
+                continue
+            if data is not None:
+                yield info.filename, data, None
+
+def _tar_members(f, limits):
+    # Stream mode reads the archive strictly forwards, decompressing on the fly
+    with tarfile.open(fileobj=f, mode='r|*') as archive:
+        for member in archive:
+            if not member.isfile() or not limits.admit(member.name, member.size):
+                continue
+            try:
+                data = limits.read(member.name, archive.extractfile(member))
+            except READ_ERRORS as e:
+                yield _failed_member(member.name, e, limits)
+                continue
+            if data is not None:
+                yield member.name, data, None
+
+def _failed_member(name, error, limits):
+    print(f"Error reading container member {name}: {error}")
+    limits.remaining_members -= 1  # Corrupt members still count, so a damaged archive cannot run unbounded
+    return name, None, str(error)
+
+def _pdf_buffer(f):
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # In-memory members have no descriptor; empty files cannot be mapped
+        f.seek(0)
+        return f.read()
+
+def _pdf_members(f, limits):
+    """JPEG images embedded as DCTDecode streams; other filters would need re-encoding and are skipped."""
+    data = _pdf_buffer(f)
+    try:
+        position = 0
+        for match in _PDF_STREAM.finditer(data):
+            if match.start() < position:  # Inside the previous image's data
+                continue
+            header = data[max(0, match.start() - PDF_DICTIONARY_WINDOW):match.start()]
+            objects = list(_PDF_OBJECT.finditer(header))
+            if not objects:
+                continue
+            dictionary = header[objects[-1].end():]
+            if not _PDF_DCT_FILTER.search(dictionary):
+                continue
+            start = match.end()
+            length = _PDF_LENGTH.search(dictionary)
+            if length:
+                end = start + int(length.group(1))
+            else:  # Indirect /Length: the data runs up to endstream
+                end = data.find(b'endstream', start)
+                if end < 0:
+                    continue
+                # The end-of-line before endstream is not part of the data
+                if data[end - 2:end] == b'\r\n':
+                    end -= 2
+                elif data[end - 1:end] in (b'\n', b'\r'):
+                    end -= 1
+            name = f"obj{int(objects[-1].group(1))}.jpg"
+            if data[start:start + 2] != b'\xff\xd8' or not limits.admit(name, end - start):
+                continue
+            position = end
+            limits.remaining_members -= 1
+            limits.remaining_bytes -= end - start
+            yield name, data[start:end], None
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
\ No newline at end of file
@@ -1,33 +1,50 @@
+import hashlib
+import heapq
+import os
+import warnings
 from PIL import Image
 import numpy as np
-from statistical_analysis import calculate_histogram, calculate_chi_square
+from statistical_analysis import (calculate_histogram, calculate_channel_histograms, calculate_chi_square,
+                                  calculate_pairs_of_values_chi_square, chi_square_survival, calculate_rs_counts,
+                                  estimate_rs_payload, calculate_sample_pair_counts, estimate_spa_payload,
+                                  calculate_block_histograms, calculate_rolling_window_stats)
+from utils import normalize_pixels, iter_pixel_bands
+from jpeg_dct import decode_component, encode_blocks
+from detector_registry import DetectorSpec
+
+TILED_LSB_BAND_PIXELS = 4 * 1024 * 1024  # Pixels decoded and indexed per band of tile-rows
+MIN_TILE_DEGREES_OF_FREEDOM = 8  # Tiles with fewer distinct value pairs are too flat to test
+POV_MIN_EXPECTED = 5  # Value pairs with fewer expected samples make the chi-square approximation unreliable
+JSTEG_PREFIXES = 10  # Growing fractions of the coefficients tested for sequential embedding
+DCT_VALUE_OFFSET = 1024  # Baseline AC coefficients lie in [-1023, 1023]; the offset keeps value parity
+F5_FREQUENCIES = (1, 8, 9)  # Natural-order indices of the (0,1), (1,0) and (1,1) DCT modes
+ENTROPY_WINDOW_BYTES = 4096  # Sliding window of entropy_profile_analysis
+ENTROPY_STEP_BYTES = 1024  # Distance between consecutive windows; divides ENTROPY_WINDOW_BYTES
+ENTROPY_HIGH_THRESHOLD = 7.5  # Bits per byte; random 4 KiB windows measure about 7.95
+ENTROPY_CURVE_POINTS = 256  # The reported curve has between this many and twice this many points
+ENTROPY_MAX_SEGMENTS = 20  # Longest high-entropy segments reported
+ENTROPY_MIN_PAYLOAD_BYTES = 16384  # Shorter high-entropy segments do not raise the suspicion score
+OVERSIZED_METADATA_SCORE = 0.6  # Large metadata is common (ICC profiles, thumbnails); appended data is not
 
 # Image Steganalysis Methods
-def lsb_analysis(image, features):
+def lsb_analysis(image, features, pixels=None, channel_histograms=None):
     """Basic LSB analysis by examining the distribution of LSBs."""
     print("Performing basic LSB statistical analysis on image.")
-    img_array = np.array(image)
+    histograms = channel_histograms
+    if histograms is None:
+        histograms = calculate_channel_histograms(pixels if pixels is not None else normalize_pixels(image))
 
-    # Analyze each color channel independently
+    # Analyze each color channel independently; odd histogram bins are the pixels whose LSB is 1
     lsb_anomalies = {}
-    for channel in range(img_array.shape[-1]):  # Iterate through color channels
-        lsb_plane = img_array[:, :, channel] & 1
-        unique_bits, counts = np.unique(lsb_plane, return_counts=True)
-        probabilities = counts / np.sum(counts)
-
-        expected_probability = 0.5
-        expected_counts = np.array([len(lsb_plane) * expected_probability] * len(unique_bits))
-
-        # Ensure both 0 and 1 are present for chi-square test
-        observed_counts = np.zeros(2)
-        observed_map = {bit: count for bit, count in zip(unique_bits, counts)}
-        observed_counts[0] = observed_map.get(0, 0)
-        observed_counts[1] = observed_map.get(1, 0)
-        expected_counts_adjusted = np.array([len(lsb_plane) * expected_probability] * 2)
+    ones = histograms[:, 1::2].sum(axis=1)
+    total = histograms.sum(axis=1)
+    for channel in range(histograms.shape[0]):  # Iterate through color channels
+        observed_counts = np.array([total[channel] - ones[channel], ones[channel]])
+        expected_counts = np.full(2, total[channel] * 0.5)
 
         # Perform chi-square test
-        if np.all(expected_counts_adjusted > 0):
-            chi2_value = calculate_chi_square(observed_counts, expected_counts_adjusted)
+        if np.all(expected_counts > 0):
+            chi2_value = calculate_chi_square(observed_counts, expected_counts)
             # A high chi-square value might indicate a deviation from randomness
             lsb_anomalies[f"channel_{channel}"] = {"chi2_value": chi2_value}
         else:
@@ -35,28 +52,286 @@ def lsb_analysis(image, features):
 
     return {"lsb_statistical_anomalies": lsb_anomalies}
 
-def visual_lsb_analysis(image, features):
-    """Creates and returns the bit planes for visual inspection."""
+def tiled_lsb_analysis(image, features, pixels=None, config=None):
+    """Localized LSB analysis: per-tile pairs-of-values chi-square and LSB-ratio maps.
+
+    Small payloads are diluted in a whole-image statistic, so the image is cut into
+    square tiles and every tile gets its own 256-bin histogram. LSB replacement
+    equalizes the (2k, 2k+1) pairs, so tiles with the lowest chi-square per degree of
+    freedom are reported as the most suspicious regions. Partial tiles at the right and
+    bottom edges are ignored.
+    """
+    print("Performing tiled LSB analysis on image.")
+    config = config or {}
+    tile = config.get('lsb_tile_size', 64)
+    top_k = config.get('lsb_top_k', 5)
+    height, width = pixels.shape[:2] if pixels is not None else image.size[::-1]
+    rows, cols = height // tile, width // tile
+    if rows == 0 or cols == 0:
+        return {"error": f"Image smaller than one {tile}x{tile} tile"}
+
+    # Per-tile histograms in one bincount per band: each pixel is indexed by tile_id * 256 + value
+    block_histograms = np.zeros((rows, cols, 256), dtype=np.int32)
+    tile_rows_per_band = max(1, TILED_LSB_BAND_PIXELS // (tile * tile * cols))
+    column_ids = np.arange(cols * tile) // tile
+    for top, band in iter_pixel_bands(image, tile * tile_rows_per_band, pixels):
+        band_rows = min(band.shape[0] // tile, rows - top // tile)
+        if band_rows == 0:
+            continue
+        band = band[:band_rows * tile, :cols * tile]
+        block_ids = (np.arange(band_rows * tile) // tile)[:, None] * cols + column_ids[None, :]
+        index = block_ids[:, :, None] * 256 + band
+        counts = np.bincount(index.ravel(), minlength=band_rows * cols * 256)
+        block_histograms[top // tile:top // tile + band_rows] = counts.reshape(band_rows, cols, 256)
+
+    chi2, dof = calculate_pairs_of_values_chi_square(block_histograms)
+    lsb_ratio = block_histograms[..., 1::2].sum(axis=-1) / block_histograms.sum(axis=-1)
+    testable = dof >= MIN_TILE_DEGREES_OF_FREEDOM
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi2_per_dof = np.where(testable, chi2 / dof, np.nan)
+
+    suspicious_regions = []
+    ranking = np.argsort(np.where(testable, chi2_per_dof, np.inf), axis=None)[:top_k]
+    for flat_index in ranking:
+        row, col = divmod(int(flat_index), cols)
+        if not testable[row, col]:
+            break
+        suspicious_regions.append({
+            "x": col * tile, "y": row * tile, "width": tile, "height": tile,
+            "chi2_per_dof": round(float(chi2_per_dof[row, col]), 4),
+            "lsb_ratio": round(float(lsb_ratio[row, col]), 4),
+        })
+
+    heatmap_size = config.get('lsb_heatmap_size', 32)
+    return {
+        "tile_size": tile,
+        "grid": [rows, cols],
+        "heatmap": {
+            "chi2_per_dof": _compact_map(chi2_per_dof, heatmap_size),
+            "lsb_ratio": _compact_map(lsb_ratio, heatmap_size),
+        },
+        "suspicious_regions": suspicious_regions,
+    }
+
+def _compact_map(values, max_size):
+    """Averages a 2D map down to at most max_size x max_size cells; untestable cells become None."""
+    rows, cols = values.shape
+    row_factor, col_factor = -(-rows // max_size), -(-cols // max_size)
+    padded = np.full((-(-rows // row_factor) * row_factor, -(-cols // col_factor) * col_factor), np.nan)
+    padded[:rows, :cols] = values
+    blocks = padded.reshape(padded.shape[0] // row_factor, row_factor, padded.shape[1] // col_factor, col_factor)
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN cells
+        reduced = np.nanmean(blocks, axis=(1, 3))
+    return np.where(np.isnan(reduced), None, np.round(reduced, 3)).tolist()
+
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+class BitPlanes:
+    """Lazy accessor for the bit planes of a (H, W, C) uint8 array.
+
+    Planes are only extracted when requested and are kept packed 8 pixels per byte
+    (np.packbits along each row), which is also the raw layout of a PIL mode '1' image.
+    """
+    def __init__(self, pixels):
+        self.pixels = pixels
+        self.packed = {}
+
+    @property
+    def channels(self):
+        return self.pixels.shape[-1]
+
+    def get(self, plane, channel):
+        """Returns the packed plane, shape (H, ceil(W / 8))."""
+        key = (plane, channel)
+        if key not in self.packed:
+            bits = (self.pixels[:, :, channel] >> plane) & 1
+            self.packed[key] = np.packbits(bits, axis=1)
+        return self.packed[key]
+
+    def iter_planes(self, planes=None, channels=None):
+        """Yields (plane, channel, packed) for the requested planes and channels only."""
+        for channel in (range(self.channels) if channels is None else channels):
+            for plane in (range(8) if planes is None else planes):
+                yield plane, channel, self.get(plane, channel)
+
+    def to_image(self, plane, channel):
+        height, width = self.pixels.shape[:2]
+        return Image.frombytes('1', (width, height), self.get(plane, channel).tobytes())
+
+def visual_lsb_analysis(image, features, pixels=None, config=None, bit_planes=None, source_path=None):
+    """Extracts the requested bit planes and optionally saves them as PNGs for visual inspection."""
     print("Generating bit planes for visual LSB analysis.")
-    img_array = np.array(image)
-    bit_planes = []
-    for i in range(8):  # Iterate through all 8 bit planes
-        bit_plane = ((img_array >> i) & 1) * 255  # Extract and scale to 0-255
-        bit_planes.append(Image.fromarray(bit_plane.astype(np.uint8)))
-    return {"bit_planes": "Generated (can't be directly shown in report)"} # Indicate generation
-
-def histogram_analysis(image, features):
+    config = config or {}
+    if bit_planes is None:
+        bit_planes = BitPlanes(pixels if pixels is not None else normalize_pixels(image))
+    planes = config.get('bit_planes', [0])
+    channels = config.get('bit_plane_channels')
+    channels = [c for c in channels if c < bit_planes.channels] if channels is not None else None
+
+    artifact_dir = None
+    if config.get('bit_plane_artifacts'):
+        artifact_dir = os.path.join(config.get('report_output_dir', 'reports'), 'bit_planes')
+        os.makedirs(artifact_dir, exist_ok=True)
+    source_name = os.path.basename(source_path or getattr(image, 'filename', '') or 'image')
+
+    pixel_count = bit_planes.pixels.shape[0] * bit_planes.pixels.shape[1]
+    summary = {}
+    for plane, channel, packed in bit_planes.iter_planes(planes, channels):
+        # Row padding bits are zero, so counting set bits over the packed rows is exact
+        ones = int(_POPCOUNT[packed].sum())
+        entry = {"ones_ratio": round(ones / pixel_count, 4) if pixel_count else None}
+        if artifact_dir:
+            # Named by content, so same-named files in different directories (or frames) never collide
+            digest = hashlib.blake2b(packed, digest_size=8).hexdigest()
+            artifact = os.path.join(artifact_dir, f"{source_name}_channel{channel}_plane{plane}_{digest}.png")
+            bit_planes.to_image(plane, channel).save(artifact, optimize=True)
+            entry["artifact"] = artifact
+        summary.setdefault(f"channel_{channel}", {})[f"plane_{plane}"] = entry
+    return {"bit_planes": summary}
+
+def histogram_analysis(image, features, pixels=None, channel_histograms=None):
     """Analyzes the color histograms for unusual patterns."""
     print("Performing histogram analysis on image.")
     histograms = {}
-    img_array = np.array(image)
-    for i in range(img_array.shape[-1]):  # For each color channel
-        histogram = calculate_histogram(img_array[:, :, i].flatten())
+    if channel_histograms is None:  # All channels in one call
+        channel_histograms = calculate_channel_histograms(pixels if pixels is not None else normalize_pixels(image))
+    for i, histogram in enumerate(channel_histograms):  # For each color channel
         histograms[f"channel_{i}"] = histogram
         # You would typically look for sharp drops, unexpected spikes, or uneven distributions
         # More sophisticated analysis would be needed here.
     return {"color_histograms": "Analysis performed (histograms in report)"}
 
+def _payload_summary(estimates):
+    """Per-channel payload estimates plus the largest one, clipped to [0, 1], as the suspicion score."""
+    channels = {f"channel_{i}": (None if estimate is None else float(estimate)) for i, estimate in enumerate(estimates)}
+    valid = [estimate for estimate in channels.values() if estimate is not None]
+    payload = min(1.0, max(0.0, max(valid))) if valid else None
+    return {"payload_estimates": channels, "estimated_payload": payload, "suspicion_score": payload}
+
+def pairs_of_values_analysis(image, features, pixels=None, channel_histograms=None):
+    """Westfeld-Pfitzmann pairs-of-values chi-square test with its p-value per channel.
+
+    The p-value is the probability of a chi-square at least this large when the (2k, 2k+1)
+    pairs are equalized, so it approaches 1 for images fully embedded by LSB replacement.
+    """
+    print("Performing pairs-of-values chi-square analysis on image.")
+    if channel_histograms is None:
+        channel_histograms = calculate_channel_histograms(pixels if pixels is not None else normalize_pixels(image))
+    chi2, dof = calculate_pairs_of_values_chi_square(channel_histograms, min_expected=POV_MIN_EXPECTED)
+    channels = {}
+    p_values = []
+    for channel in range(channel_histograms.shape[0]):
+        p_value = chi_square_survival(float(chi2[channel]), int(dof[channel])) if dof[channel] > 0 else None
+        channels[f"channel_{channel}"] = {"chi2_value": float(chi2[channel]), "degrees_of_freedom": int(dof[channel]),
+                                          "p_value": p_value}
+        if p_value is not None:
+            p_values.append(p_value)
+    return {"pairs_of_values": channels, "suspicion_score": max(p_values) if p_values else None}
+
+def rs_analysis(image, features, pixels=None):
+    """Fridrich-Goljan-Du RS analysis: estimates the LSB replacement payload from regular/singular groups."""
+    print("Performing RS analysis on image.")
+    if pixels is None:
+        pixels = normalize_pixels(image)
+    counts = calculate_rs_counts(pixels)
+    result = _payload_summary([estimate_rs_payload(channel_counts) for channel_counts in counts])
+    result["group_counts"] = {f"channel_{i}": dict(zip(("R_M", "S_M", "R_-M", "S_-M"), channel_counts[:4].tolist()))
+                              for i, channel_counts in enumerate(counts)}
+    return result
+
+def sample_pair_analysis(image, features, pixels=None, neighbor_pairs=None):
+    """Dumitrescu-Wu-Wang sample pair analysis over horizontally adjacent samples."""
+    print("Performing sample pair analysis on image.")
+    if neighbor_pairs is None:
+        if pixels is None:
+            pixels = normalize_pixels(image)
+        neighbor_pairs = (pixels[:, :-1], pixels[:, 1:])
+    counts = calculate_sample_pair_counts(*neighbor_pairs)
+    return _payload_summary([estimate_spa_payload(channel_counts) for channel_counts in counts])
+
+def jsteg_analysis(image, features, dct_coefficients=None):
+    """Pairs-of-values test on quantized AC coefficients, for JSteg-style LSB replacement.
+
+    JSteg replaces the LSB of every AC coefficient other than 0 and 1, which equalizes the
+    pairs (2k, 2k+1) for k != 0. It embeds in file order, so the test is also run on growing
+    fractions of the block rows to catch short messages at the start of the image.
+    """
+    print("Performing JSteg DCT analysis on image.")
+    if dct_coefficients is None:
+        return {"error": "DCT coefficients unavailable (not a baseline JPEG, or over dct_max_pixels)"}
+    bins = 2 * DCT_VALUE_OFFSET
+    histograms = np.zeros((JSTEG_PREFIXES, bins), dtype=np.int64)
+    for component in dct_coefficients.components:
+        blocks = component["blocks"]
+        if blocks.size == 0:
+            continue
+        prefix = np.arange(blocks.shape[0]) * JSTEG_PREFIXES // blocks.shape[0]
+        values = np.clip(blocks[:, :, 1:].astype(np.int32) + DCT_VALUE_OFFSET, 0, bins - 1)
+        index = prefix[:, np.newaxis, np.newaxis] * bins + values
+        histograms += np.bincount(index.ravel(), minlength=JSTEG_PREFIXES * bins).reshape(JSTEG_PREFIXES, bins)
+    histograms = np.cumsum(histograms, axis=0)
+    histograms[:, DCT_VALUE_OFFSET:DCT_VALUE_OFFSET + 2] = 0  # The (0, 1) pair is never embedded
+    chi2, dof = calculate_pairs_of_values_chi_square(histograms, min_expected=POV_MIN_EXPECTED)
+    p_values = [chi_square_survival(float(c), int(d)) if d > 0 else None for c, d in zip(chi2, dof)]
+    by_fraction = {f"{(i + 1) * 100 // JSTEG_PREFIXES}%": p for i, p in enumerate(p_values)}
+    valid = [p for p in p_values if p is not None]
+    return {"chi2_value": float(chi2[-1]), "degrees_of_freedom": int(dof[-1]), "p_value": p_values[-1],
+            "p_value_by_fraction": by_fraction, "suspicion_score": max(valid) if valid else None}
+
+def f5_analysis(image, features, dct_coefficients=None):
+    """Calibration attack on F5: estimates the fraction of modified luminance AC coefficients.
+
+    F5 decrements coefficient magnitudes, moving low-frequency histogram mass towards 0.
+    The luminance is decompressed, cropped by 4 pixels and recompressed with the same
+    quantization table to estimate the cover histograms; the least-squares fit of the
+    shrinkage model over h(0), h(1), h(2) of the lowest AC modes gives the rate.
+    """
+    print("Performing F5 calibration analysis on image.")
+    if dct_coefficients is None:
+        return {"error": "DCT coefficients unavailable (not a baseline JPEG, or over dct_max_pixels)"}
+    luminance = dct_coefficients.components[0]
+    blocks = luminance["blocks"]
+    if luminance["quant_table"] is None or min(blocks.shape[:2]) < 2:
+        return {"error": "Image too small or missing quantization table"}
+    calibrated = encode_blocks(decode_component(luminance)[4:-4, 4:-4], luminance["quant_table"])
+    scale = (blocks.shape[0] * blocks.shape[1]) / (calibrated.shape[0] * calibrated.shape[1])
+    estimates = {}
+    for index in F5_FREQUENCIES:
+        observed = np.bincount(np.minimum(np.abs(blocks[:, :, index]), 3).ravel(), minlength=4)[:3]
+        cover = np.bincount(np.minimum(np.abs(calibrated[:, :, index]), 3).ravel(), minlength=4)[:3] * scale
+        denominator = cover[1] ** 2 + (cover[2] - cover[1]) ** 2
+        if denominator > 0:
+            estimates[f"mode_{index // 8}_{index % 8}"] = float(
+                (cover[1] * (observed[0] - cover[0]) + (observed[1] - cover[1]) * (cover[2] - cover[1])) / denominator)
+    rate = float(np.mean(list(estimates.values()))) if estimates else None
+    return {"modification_rate_by_mode": estimates, "estimated_modification_rate": rate,
+            "suspicion_score": None if rate is None else min(1.0, max(0.0, rate))}
+
+# Image and File Steganalysis Methods
+def structure_analysis(content, features, file_structure=None, config=None):
+    """Data appended after a PNG IEND, JPEG EOI or GIF trailer, and oversized metadata segments.
+
+    Works from the segment headers read by file_structure.read_file_structure, so it costs
+    a few seeks per file whatever the file size and is cheap enough to run first in bulk scans.
+    """
+    print("Performing file structure analysis.")
+    if file_structure is None:
+        return {"format": None, "suspicion_score": None}  # Not a PNG, JPEG or GIF (or not the first frame)
+    anomalies = list(file_structure["anomalies"])
+    score = 0.0
+    if file_structure["trailing_bytes"] and not file_structure["trailing_padding"]:
+        anomalies.append(f"{file_structure['trailing_bytes']} bytes after the end of the "
+                         f"{file_structure['format'].upper()} data")
+        score = 1.0
+    limit = (config or {}).get('structure_max_metadata_bytes', 262144)
+    oversized = [entry["type"] for entry in file_structure["segments"]
+                 if entry.get("metadata") and entry["bytes"] > limit]
+    if oversized:
+        anomalies.append(f"metadata over {limit} bytes in: {', '.join(oversized)}")
+        score = max(score, OVERSIZED_METADATA_SCORE)
+    return {**file_structure, "anomalies": anomalies, "suspicion_score": score}
+
 # File Steganalysis Methods
 def metadata_analysis(file_content, features):
     """Analyzes file metadata (if available in features)."""
@@ -68,29 +343,265 @@ def metadata_analysis(file_content, features):
     # Add checks for other metadata if you extract them
     return {"metadata_anomalies": metadata_anomalies}
 
-def byte_frequency_analysis(file_content, features):
+def entropy_profile_analysis(file_content, features):
+    """Sliding-window entropy profile of in-memory content (see EntropyProfileStream)."""
+    stream = EntropyProfileStream()
+    stream.update(file_content)
+    return stream.finalize(features)
+
+def byte_frequency_analysis(file_content, features, byte_counts=None):
     """Analyzes the frequency distribution of bytes."""
     print("Performing byte frequency analysis on file.")
-    histogram = calculate_histogram(file_content)
-    total_bytes = len(file_content)
+    if byte_counts is None:
+        byte_counts = calculate_histogram(file_content)
+    return _byte_frequency_deviations(byte_counts)
+
+def _byte_frequency_deviations(histogram):
+    total_bytes = histogram.sum()
     expected_frequency = total_bytes / 256.0  # Assuming a roughly uniform distribution
-    deviations = {}
-    for byte_val, count in histogram.items():
-        deviation = count - expected_frequency
-        if abs(deviation) > (0.05 * expected_frequency): # Example threshold: 5% deviation
-            deviations[byte_val] = deviation
+    deviation = histogram - expected_frequency
+    # Example threshold: 5% deviation, only for byte values that actually occur
+    flagged = np.flatnonzero((histogram > 0) & (np.abs(deviation) > 0.05 * expected_frequency))
+    deviations = {int(byte_val): float(deviation[byte_val]) for byte_val in flagged}
     return {"byte_frequency_deviations": deviations}
 
+# Streaming File Steganalysis Methods
+class StreamingFileDetector:
+    """File detector that accumulates its statistics chunk by chunk in constant memory.
+
+    An instance is created per file, update() is called with every chunk in order and
+    finalize() receives the completed file features, plus the shared products declared
+    in the detector's spec as keyword arguments, and returns the detection result.
+    Detectors with needs_stream False use neither the chunks nor the features; they are
+    finalized (with features None) before the file is streamed, and when one of them
+    short-circuits the file is not read at all.
+    """
+    needs_stream = True
+
+    def update(self, chunk):
+        pass
+
+    def finalize(self, features, **products):
+        raise NotImplementedError
+
+class MetadataAnalysisStream(StreamingFileDetector):
+    def finalize(self, features, **products):
+        return metadata_analysis(None, features)  # Only the features are inspected
+
+class StructureAnalysisStream(StreamingFileDetector):
+    """Seeks through the file's headers itself, so the streamed chunks are not needed."""
+    needs_stream = False
+
+    def finalize(self, features, **products):
+        return structure_analysis(None, features, **products)
+
+class ByteFrequencyStream(StreamingFileDetector):
+    """Reuses the byte counts already accumulated by the file feature pass."""
+    def finalize(self, features, byte_counts=None, **products):
+        print("Performing byte frequency analysis on file.")
+        return _byte_frequency_deviations(byte_counts)
+
+class EntropyProfileStream(StreamingFileDetector):
+    """Sliding-window byte entropy and uniformity chi-square over the whole file, in one pass.
+
+    Windows of ENTROPY_WINDOW_BYTES start every ENTROPY_STEP_BYTES; their 256-bin counts
+    are rolled forward from per-step block histograms, so the work is linear in the file
+    size and memory stays constant: the curve is kept at most 2 * ENTROPY_CURVE_POINTS
+    points long by merging neighbouring points (mean and max entropy) as the file grows,
+    and only the longest high-entropy segments are kept. The final partial step is not
+    windowed. A high-entropy run inside an otherwise lower-entropy file (an encrypted or
+    compressed payload hidden in structured data) raises the suspicion score.
+    """
+    def __init__(self):
+        self.window_blocks = ENTROPY_WINDOW_BYTES // ENTROPY_STEP_BYTES
+        self.remainder = b''
+        self.carry = None
+        self.windows = 0
+        self.high_windows = 0
+        self.curve_sum = np.zeros(0)
+        self.curve_max = np.zeros(0)
+        self.curve_count = np.zeros(0, dtype=np.int64)
+        self.bucket = 1  # Windows per curve point
+        self.segment = None  # State of the open high-entropy run
+        self.segments = []  # Heap of the longest closed runs
+        self.segment_count = 0
+
+    def update(self, chunk):
+        data = self.remainder + chunk if self.remainder else chunk
+        usable = len(data) - len(data) % ENTROPY_STEP_BYTES
+        self.remainder = bytes(data[usable:])
+        if usable == 0:
+            return
+        histograms = calculate_block_histograms(memoryview(data)[:usable], ENTROPY_STEP_BYTES)
+        entropies, chi2, self.carry = calculate_rolling_window_stats(histograms, self.window_blocks, self.carry)
+        if len(entropies):
+            self._add_to_curve(entropies)
+            self._track_segments(entropies, chi2)
+            self.windows += len(entropies)
+
+    def _add_to_curve(self, entropies):
+        if len(self.curve_count) and self.curve_count[-1] < self.bucket:  # Fill the partial last point
+            take = min(self.bucket - int(self.curve_count[-1]), len(entropies))
+            self.curve_sum[-1] += entropies[:take].sum()
+            self.curve_max[-1] = max(self.curve_max[-1], entropies[:take].max())
+            self.curve_count[-1] += take
+            entropies = entropies[take:]
+        if len(entropies):
+            groups = np.arange(0, len(entropies), self.bucket)
+            self.curve_sum = np.concatenate((self.curve_sum, np.add.reduceat(entropies, groups)))
+            self.curve_max = np.concatenate((self.curve_max, np.maximum.reduceat(entropies, groups)))
+            self.curve_count = np.concatenate((self.curve_count, np.diff(np.append(groups, len(entropies)))))
+        while len(self.curve_count) > 2 * ENTROPY_CURVE_POINTS:
+            # Merge neighbouring points; only the last point can be partial, so all others stay equal
+            pairs = np.arange(0, len(self.curve_count), 2)
+            self.curve_sum = np.add.reduceat(self.curve_sum, pairs)
+            self.curve_max = np.maximum.reduceat(self.curve_max, pairs)
+            self.curve_count = np.add.reduceat(self.curve_count, pairs)
+            self.bucket *= 2
+
+    def _track_segments(self, entropies, chi2):
+        high = entropies >= ENTROPY_HIGH_THRESHOLD
+        self.high_windows += int(high.sum())
+        boundaries = np.concatenate(([0], np.flatnonzero(high[1:] != high[:-1]) + 1, [len(high)]))
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            if not high[start]:
+                self._close_segment()
+                continue
+            if self.segment is None:
+                self.segment = {"first": self.windows + int(start), "windows": 0, "entropy_sum": 0.0,
+                                "chi2_sum": 0.0, "chi2_windows": 0, "head": np.zeros(0), "tail": np.zeros(0)}
+            self._add_segment_chi2(chi2[start:end])
+            self.segment["windows"] += int(end - start)
+            self.segment["entropy_sum"] += float(entropies[start:end].sum())
+
+    def _add_segment_chi2(self, chi2):
+        # A run's first and last window_blocks - 1 windows may straddle its edges, and the
+        # surrounding structured bytes inflate their chi-square; only interior windows are
+        # averaged. The trailing edge is unknown until the run closes, so it is held back.
+        segment = self.segment
+        edge = self.window_blocks - 1
+        index = segment["windows"] - len(segment["tail"])  # Run index of the first held-back window
+        pending = np.concatenate((segment["tail"], chi2))
+        released = pending[:max(0, len(pending) - edge)]
+        segment["tail"] = pending[len(released):]
+        head = max(0, min(edge - index, len(released)))
+        segment["head"] = np.concatenate((segment["head"], released[:head]))
+        segment["chi2_sum"] += float(released[head:].sum())
+        segment["chi2_windows"] += len(released) - head
+
+    def _close_segment(self):
+        if self.segment is None:
+            return
+        segment = self.segment
+        first, windows = segment["first"], segment["windows"]
+        start = first * ENTROPY_STEP_BYTES
+        end = (first + windows - 1) * ENTROPY_STEP_BYTES + ENTROPY_WINDOW_BYTES
+        if segment["chi2_windows"]:
+            chi2 = segment["chi2_sum"] / segment["chi2_windows"]
+        else:  # Too short for interior windows; the middle window overlaps the run the most
+            chi2 = float(np.concatenate((segment["head"], segment["tail"]))[windows // 2])
+        entry = (end - start, start, segment["entropy_sum"] / windows, chi2)
+        if len(self.segments) < ENTROPY_MAX_SEGMENTS:
+            heapq.heappush(self.segments, entry)
+        else:
+            heapq.heappushpop(self.segments, entry)
+        self.segment_count += 1
+        self.segment = None
+
+    def finalize(self, features, **products):
+        print("Performing sliding-window entropy analysis on file.")
+        self._close_segment()
+        if self.windows == 0:
+            return {"windows": 0, "note": f"File shorter than one {ENTROPY_WINDOW_BYTES}-byte window",
+                    "suspicion_score": None}
+        segments = []
+        for length, start, entropy, chi2 in sorted(self.segments, key=lambda entry: entry[1]):
+            p_value = chi_square_survival(chi2, 255)
+            segments.append({"offset": start, "length": length, "mean_entropy": entropy, "mean_chi2": chi2,
+                             "uniformity_p_value": p_value, "random_like": p_value >= 0.01})
+        high_fraction = self.high_windows / self.windows
+        # A payload stands out only against lower-entropy surroundings; wholly compressed files do not
+        longest = max(segments, key=lambda segment: segment["length"], default=None)
+        score = 0.0
+        if high_fraction <= 0.5 and longest and longest["length"] >= ENTROPY_MIN_PAYLOAD_BYTES:
+            score = 1.0 if longest["random_like"] else 0.5
+        return {
+            "window_bytes": ENTROPY_WINDOW_BYTES, "step_bytes": ENTROPY_STEP_BYTES, "windows": self.windows,
+            "high_entropy_threshold": ENTROPY_HIGH_THRESHOLD, "high_entropy_fraction": high_fraction,
+            "curve_bytes_per_point": self.bucket * ENTROPY_STEP_BYTES,
+            "entropy_curve": (self.curve_sum / self.curve_count).round(4).tolist(),
+            "entropy_curve_max": self.curve_max.round(4).tolist(),
+            "high_entropy_segments": segments, "high_entropy_segment_count": self.segment_count,
+            "suspicion_score": score,
+        }
+
+class OneShotAdapter(StreamingFileDetector):
+    """Runs a detector with the (file_content, features) signature by buffering the whole file."""
+    def __init__(self, method_func):
+        self.method_func = method_func
+        self.buffer = bytearray()
+
+    def update(self, chunk):
+        self.buffer += chunk
+
+    def finalize(self, features, **products):
+        return self.method_func(self.buffer, features, **products)
+
 # Dictionary to hold the detection methods for easy calling
 image_detection_methods = {
     "lsb_analysis": lsb_analysis,
+    "tiled_lsb_analysis": tiled_lsb_analysis,
     "visual_lsb_analysis": visual_lsb_analysis,
     "histogram_analysis": histogram_analysis,
+    "pairs_of_values_analysis": pairs_of_values_analysis,
+    "sample_pair_analysis": sample_pair_analysis,
+    "rs_analysis": rs_analysis,
+    "jsteg_analysis": jsteg_analysis,
+    "f5_analysis": f5_analysis,
+    "structure_analysis": structure_analysis,
     # Add more image analysis methods here
 }
 
 file_detection_methods = {
     "metadata_analysis": metadata_analysis,
     "byte_frequency_analysis": byte_frequency_analysis,
+    "entropy_profile_analysis": entropy_profile_analysis,
+    "structure_analysis": structure_analysis,
     # Add more file analysis methods here
-}
\ No newline at end of file
+}
+
+# Declared inputs and relative costs for the execution planner (see detector_registry).
+# Methods added to the dicts above without a spec get one inferred from their parameters.
+image_detector_specs = {
+    "lsb_analysis": DetectorSpec(requires=("channel_histograms",), cost=1.0),
+    "histogram_analysis": DetectorSpec(requires=("channel_histograms",), cost=1.0),
+    "visual_lsb_analysis": DetectorSpec(requires=("bit_planes", "config", "source_path"), cost=2.0, version=3),
+    "tiled_lsb_analysis": DetectorSpec(requires=("config",), optional=("pixels",), cost=4.0),
+    "pairs_of_values_analysis": DetectorSpec(requires=("channel_histograms",), cost=1.0, screening=True),
+    "sample_pair_analysis": DetectorSpec(requires=("neighbor_pairs",), cost=2.0, screening=True),
+    "rs_analysis": DetectorSpec(requires=("pixels",), cost=3.0),
+    "jsteg_analysis": DetectorSpec(requires=("dct_coefficients",), cost=0.5),
+    "f5_analysis": DetectorSpec(requires=("dct_coefficients",), cost=1.5),
+    "structure_analysis": DetectorSpec(requires=("file_structure", "config"), cost=0.1, screening=True),
+}
+
+file_detector_specs = {
+    "metadata_analysis": DetectorSpec(cost=0.0),
+    "byte_frequency_analysis": DetectorSpec(requires=("byte_counts",), cost=0.5),
+    "entropy_profile_analysis": DetectorSpec(cost=1.0),
+    "structure_analysis": DetectorSpec(requires=("file_structure", "config"), cost=0.1),
+}
+
+streaming_file_detection_methods = {
+    "metadata_analysis": MetadataAnalysisStream,
+    "byte_frequency_analysis": ByteFrequencyStream,
+    "entropy_profile_analysis": EntropyProfileStream,
+    "structure_analysis": StructureAnalysisStream,
+    # Methods without a streaming implementation run through OneShotAdapter
+}
+
+def create_streaming_detector(method_name):
+    """Returns a fresh streaming detector for a file method, adapting one-shot methods."""
+    if method_name in streaming_file_detection_methods:
+        return streaming_file_detection_methods[method_name]()
+    return OneShotAdapter(file_detection_methods[method_name])
\ No newline at end of file
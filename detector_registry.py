@@ -0,0 +1,73 @@
+import inspect
+from profiling import NULL_PROFILER
+
+class DetectorSpec:
+    """Declares what a detector consumes and roughly what it costs.
+
+    requires: shared intermediate products passed to the detector as keyword arguments.
+    optional: products passed only when they have already been computed for another detector.
+    cost: relative cost (1.0 is about one pass over the decoded pixels); cheaper detectors run first.
+    version: bump when the detector's output changes so cached results are invalidated.
+    screening: stays meaningful on a reduced-resolution decode and reports a suspicion_score,
+        so it can screen large images before they are decoded at full resolution.
+    """
+    def __init__(self, requires=(), optional=(), cost=1.0, version=1, screening=False):
+        self.requires = tuple(requires)
+        self.optional = tuple(optional)
+        self.cost = cost
+        self.version = version
+        self.screening = screening
+
+def infer_spec(method_func, product_names):
+    """Spec for a detector added to the method dicts without a declaration.
+
+    Any product whose name appears as a parameter of the detector is treated as required.
+    """
+    try:
+        parameters = inspect.signature(method_func).parameters
+    except (TypeError, ValueError):
+        return DetectorSpec()
+    return DetectorSpec(requires=[name for name in product_names if name in parameters])
+
+class ProductContext:
+    """Computes each shared intermediate product (decoded pixels, histograms, ...) at most once per file."""
+    def __init__(self, providers, profiler=NULL_PROFILER):
+        self.providers = providers  # name -> callable(context) returning the product
+        self.profiler = profiler
+        self.values = {}
+
+    def get(self, name):
+        if name not in self.values:
+            with self.profiler.stage(f"product:{name}"):
+                self.values[name] = self.providers[name](self)
+        return self.values[name]
+
+    def arguments(self, spec):
+        arguments = {name: self.get(name) for name in spec.requires}
+        for name in spec.optional:
+            if name in self.values:
+                arguments[name] = self.values[name]
+        return arguments
+
+def plan_detectors(methods, specs, selected_names, product_names):
+    """Returns [(name, func, spec)] for the selected methods, cheapest first (ties keep dict order)."""
+    plan = []
+    for method_name, method_func in methods.items():
+        if method_name in selected_names:
+            spec = specs.get(method_name) or infer_spec(method_func, product_names)
+            plan.append((method_name, method_func, spec))
+    plan.sort(key=lambda entry: entry[2].cost)
+    return plan
+
+def suspicion_score(result):
+    """Detectors that can quantify their finding report a 0-1 'suspicion_score' in their result."""
+    if isinstance(result, dict) and result.get('suspicion_score') is not None:
+        return float(result['suspicion_score'])
+    return None
+
+def should_short_circuit(result, config):
+    """True when short-circuiting is enabled and the result already meets suspicious_threshold."""
+    if not config.get('short_circuit'):
+        return False
+    score = suspicion_score(result)
+    return score is not None and score >= config.get('suspicious_threshold', 0.7)
\ No newline at end of file
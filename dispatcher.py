@@ -0,0 +1,57 @@
+import io
+from file_type import open_and_sniff, sniff_file_type, HEADER_SIZE
+from image_analyzer import analyze_image
+from file_analyzer import analyze_file
+from containers import ContainerLimits, is_container, iter_container_members, MEMBER_SEPARATOR
+
+def analyze_path(file_path, config):
+    """Opens a file once, sniffs its type from the header and routes it to the matching analyzer.
+
+    Members of ZIP, TAR and PDF containers are analyzed too, recursively up to
+    container_max_depth, and listed under "members" as {"path": "outer.zip!member", ...};
+    a member that cannot be read is listed as {"path": ..., "error": message}.
+    """
+    try:
+        f, category, file_format = open_and_sniff(file_path)
+    except FileNotFoundError:
+        print(f"Error: File not found: {file_path}")
+        return {}
+    except OSError as e:
+        print(f"Error reading file: {e}")
+        return {}
+
+    with f:
+        return _analyze_open_file(file_path, f, category, file_format, config, ContainerLimits(config), 0)
+
+def _analyze_open_file(file_path, f, category, file_format, config, limits, depth):
+    analysis_results = {}
+    if category == 'image':
+        analysis_results = analyze_image(file_path, config, file=f)
+        if not analysis_results:
+            # Sniffed as an image but PIL cannot decode it; fall back to byte-level analysis
+            f.seek(0)
+    if not analysis_results:
+        analysis_results = analyze_file(file_path, config, file=f)
+    if analysis_results:
+        analysis_results["detected_type"] = {"category": category, "format": file_format}
+    if is_container(file_format) and depth < limits.max_depth:
+        members = _analyze_members(file_path, f, file_format, config, limits, depth + 1)
+        if members:
+            analysis_results["members"] = members
+    return analysis_results
+
+def _analyze_members(container_path, f, file_format, config, limits, depth):
+    """Analyzes each member in memory; nested members are flattened into the same list."""
+    members = []
+    for name, data, error in iter_container_members(f, file_format, limits):
+        member_path = f"{container_path}{MEMBER_SEPARATOR}{name}"
+        if error is not None:
+            members.append({"path": member_path, "error": error})
+            continue
+        category, member_format = sniff_file_type(data[:HEADER_SIZE])
+        results = _analyze_open_file(member_path, io.BytesIO(data), category, member_format, config, limits, depth)
+        nested = results.pop("members", [])
+        if results:
+            members.append({"path": member_path, **results})
+        members.extend(nested)
+    return members
\ No newline at end of file
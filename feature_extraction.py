@@ -1,18 +1,135 @@
 from PIL import Image
 import numpy as np
+from utils import normalize_pixels
+from statistical_analysis import (calculate_histogram, calculate_entropy, calculate_channel_histograms,
+                                  calculate_pairs_of_values_chi_square, chi_square_survival,
+                                  calculate_sample_pair_counts, estimate_spa_payload)
+
+# Fixed-length feature vectors for the classifier (see classifier.py); bump the version when
+# the layout changes so cached vectors, feature stores and trained models are not mixed up
+FEATURE_VECTOR_VERSION = 1
+COARSE_HISTOGRAM_BINS = 32
+SPAM_T = 3  # Residuals are truncated to [-T, T] for the SPAM transition matrices
+_SPAM_SIZE = (2 * SPAM_T + 1) ** 2
+FEATURE_NAMES = (
+    ["pixel_mean", "pixel_std"]
+    + [f"histogram_{i}" for i in range(COARSE_HISTOGRAM_BINS)]
+    + ["lsb_ones_ratio", "pov_chi2_per_dof", "pov_p_value", "spa_payload", "pair_imbalance"]
+    + [f"spam_{group}_{a}_{b}" for group in ("straight", "diagonal")
+       for a in range(-SPAM_T, SPAM_T + 1) for b in range(-SPAM_T, SPAM_T + 1)]
+)
+FEATURE_VECTOR_LENGTH = len(FEATURE_NAMES)
 
 # Image Feature Extraction
-def extract_image_features(image):
+def extract_image_features(image, pixels=None):
     features = {}
-    pixels = np.array(image)
+    if pixels is None:
+        pixels = normalize_pixels(image)
     features['pixel_mean'] = np.mean(pixels)
     features['pixel_std'] = np.std(pixels)
     # Add more image-specific feature extraction here (e.g., histograms)
     return features
 
+def extract_header_features(image):
+    """Features available from the image header alone, for plans that never decode pixels."""
+    return {'width': image.size[0], 'height': image.size[1], 'mode': image.mode}
+
+def extract_dct_features(dct_coefficients):
+    """Features of a JPEG taken from its quantized DCT coefficients, without decoding pixels."""
+    luminance = dct_coefficients.components[0]
+    ac = dct_coefficients.ac_coefficients()
+    features = {}
+    features['dct_blocks'] = sum(c["blocks"].shape[0] * c["blocks"].shape[1] for c in dct_coefficients.components)
+    features['dct_nonzero_ac_ratio'] = float(np.count_nonzero(ac)) / ac.size if ac.size else 0.0
+    if luminance["blocks"].size and luminance["quant_table"] is not None:
+        # The DC term is 8x the block mean, level-shifted by 128
+        dc = luminance["blocks"][:, :, 0].mean() * float(luminance["quant_table"][0, 0])
+        features['dct_luminance_mean'] = float(dc / 8.0 + 128.0)
+    return features
+
+def _transition_counts(first, second):
+    """Joint counts of consecutive truncated residuals, as a (2T+1, 2T+1) matrix."""
+    a = np.clip(first, -SPAM_T, SPAM_T) + SPAM_T
+    b = np.clip(second, -SPAM_T, SPAM_T) + SPAM_T
+    counts = np.bincount((a * (2 * SPAM_T + 1) + b).ravel(), minlength=_SPAM_SIZE)
+    return counts.reshape(2 * SPAM_T + 1, 2 * SPAM_T + 1).astype(np.float64)
+
+def _conditional(counts):
+    totals = counts.sum(axis=1, keepdims=True)
+    return np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+
+def _spam_features(channel):
+    """First-order SPAM (Pevny-Bas-Fridrich) features of one channel: 2 * (2T+1)^2 values.
+
+    Markov transition probabilities between consecutive neighbour differences are averaged
+    over the four straight and the four diagonal directions. Each reversed direction's
+    counts are the forward counts with both residual axes negated and swapped.
+    """
+    x = channel.astype(np.int16)
+    groups = []
+    for residuals, pairs in (
+            ((x[:, :-1] - x[:, 1:]), lambda d: (d[:, :-1], d[:, 1:])),  # Horizontal
+            ((x[:-1, :] - x[1:, :]), lambda d: (d[:-1], d[1:])),  # Vertical
+            ((x[:-1, :-1] - x[1:, 1:]), lambda d: (d[:-1, :-1], d[1:, 1:])),  # Main diagonal
+            ((x[1:, :-1] - x[:-1, 1:]), lambda d: (d[1:, :-1], d[:-1, 1:]))):  # Anti-diagonal
+        forward = _transition_counts(*pairs(residuals))
+        groups.append((_conditional(forward) + _conditional(forward[::-1, ::-1].T)) / 2)
+    straight = (groups[0] + groups[1]) / 2
+    diagonal = (groups[2] + groups[3]) / 2
+    return np.concatenate([straight.ravel(), diagonal.ravel()])
+
+def extract_feature_vector(pixels, channel_histograms=None, neighbor_pairs=None):
+    """Fixed-length float32 vector (FEATURE_NAMES order) of histogram, LSB and SPAM residual features.
+
+    Reuses the shared channel histograms and neighbour pairs when given. Statistics that
+    are undefined for an image (e.g. no testable value pairs) are stored as 0.
+    """
+    if channel_histograms is None:
+        channel_histograms = calculate_channel_histograms(pixels)
+    if neighbor_pairs is None:
+        neighbor_pairs = (pixels[:, :-1], pixels[:, 1:])
+    histogram = channel_histograms.sum(axis=0).astype(np.float64)
+    total = histogram.sum() or 1.0
+    values = np.arange(256)
+    mean = float((histogram * values).sum() / total)
+    std = float(np.sqrt(max(0.0, (histogram * (values - mean) ** 2).sum() / total)))
+
+    chi2, dof = calculate_pairs_of_values_chi_square(histogram, min_expected=5)
+    pair_sums = histogram[0::2] + histogram[1::2]
+    imbalance = np.abs(histogram[0::2] - histogram[1::2])[pair_sums > 0] / pair_sums[pair_sums > 0]
+    spa = estimate_spa_payload(calculate_sample_pair_counts(*neighbor_pairs).sum(axis=0))
+    lsb_features = [
+        histogram[1::2].sum() / total,
+        float(chi2) / int(dof) if dof > 0 else 0.0,
+        chi_square_survival(float(chi2), int(dof)) if dof > 0 else 0.0,
+        spa if spa is not None else 0.0,
+        imbalance.mean() if imbalance.size else 0.0,
+    ]
+
+    if pixels.shape[0] > 2 and pixels.shape[1] > 2:
+        spam = np.mean([_spam_features(pixels[:, :, c]) for c in range(pixels.shape[2])], axis=0)
+    else:
+        spam = np.zeros(2 * _SPAM_SIZE)
+    coarse = histogram.reshape(COARSE_HISTOGRAM_BINS, -1).sum(axis=1) / total
+    return np.concatenate([[mean / 255.0, std / 255.0], coarse, lsb_features, spam]).astype(np.float32)
+
 # File Feature Extraction
 def extract_file_features(file_content):
     features = {}
     features['file_size'] = len(file_content)
+    features['byte_entropy'] = calculate_entropy(calculate_histogram(file_content))
     # Add more file-specific feature extraction here (e.g., byte frequencies)
-    return features
\ No newline at end of file
+    return features
+
+class FileFeatureAccumulator:
+    """Computes the same features as extract_file_features over streamed chunks."""
+    def __init__(self):
+        self.file_size = 0
+        self.byte_counts = np.zeros(256, dtype=np.int64)
+
+    def update(self, chunk):
+        self.file_size += len(chunk)
+        self.byte_counts += calculate_histogram(chunk)
+
+    def finalize(self):
+        return {'file_size': self.file_size, 'byte_entropy': calculate_entropy(self.byte_counts)}
\ No newline at end of file
@@ -0,0 +1,98 @@
+import json
+import os
+import numpy as np
+from feature_extraction import FEATURE_NAMES, FEATURE_VECTOR_LENGTH, FEATURE_VECTOR_VERSION
+
+class FeatureStore:
+    """Append-only float32 matrix on disk, one row per scanned image.
+
+    Rows are written through a memory map to <path> (raw row-major float32), the input
+    path of each row to <path>.index (one per line) and the shape to <path>.json, so the
+    store can be memory-mapped back for training or re-scoring without loading it whole.
+    Opening an existing store of the same layout appends to it.
+    """
+    def __init__(self, path, growth_rows=4096):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.growth_rows = growth_rows
+        header = _read_header(path)
+        self.rows = header["rows"] if header and header.get("version") == FEATURE_VECTOR_VERSION else 0
+        if self.rows == 0:
+            open(path, 'wb').close()
+            open(path + ".index", 'w').close()
+        else:
+            _truncate_index(path + ".index", self.rows)
+        self.index_file = open(path + ".index", 'a')
+        self.capacity = 0
+        self.array = None
+        self._grow(self.rows + growth_rows)
+
+    def _grow(self, capacity):
+        if self.array is not None:
+            self.array.flush()
+            del self.array
+        os.truncate(self.path, capacity * FEATURE_VECTOR_LENGTH * 4)
+        self.array = np.memmap(self.path, dtype=np.float32, mode='r+', shape=(capacity, FEATURE_VECTOR_LENGTH))
+        self.capacity = capacity
+
+    def append(self, input_file, vector):
+        if self.rows == self.capacity:
+            self._grow(self.capacity + max(self.growth_rows, self.capacity // 2))
+        self.array[self.rows] = vector
+        self.index_file.write(input_file + "\n")
+        self.rows += 1
+
+    def flush(self):
+        """Makes the rows appended so far durable; a store reopened after a crash continues from here."""
+        self.array.flush()
+        self.index_file.flush()
+        self._write_header()
+
+    def close(self):
+        self.array.flush()
+        del self.array
+        self.array = None
+        os.truncate(self.path, self.rows * FEATURE_VECTOR_LENGTH * 4)  # Drop the unused preallocated rows
+        self.index_file.close()
+        self._write_header()
+
+    def _write_header(self):
+        header = {"version": FEATURE_VECTOR_VERSION, "rows": self.rows, "dim": FEATURE_VECTOR_LENGTH,
+                  "dtype": "float32", "feature_names": FEATURE_NAMES}
+        temporary_path = self.path + ".json.tmp"
+        with open(temporary_path, 'w') as f:
+            json.dump(header, f)
+        os.replace(temporary_path, self.path + ".json")
+
+def _truncate_index(index_path, rows):
+    """Drops index lines written after the last header, e.g. by a run that crashed before flushing."""
+    with open(index_path, 'r') as f:
+        paths = [line for _, line in zip(range(rows + 1), f)]
+    if len(paths) > rows:
+        with open(index_path, 'w') as f:
+            f.writelines(paths[:rows])
+
+def _read_header(path):
+    try:
+        with open(path + ".json", 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def is_feature_store(path):
+    return os.path.isfile(path) and os.path.isfile(path + ".json")
+
+def load_feature_store(path):
+    """Returns (read-only memmap of shape (rows, dim), list of input paths) for a closed store."""
+    header = _read_header(path)
+    if header is None:
+        raise ValueError(f"{path} is not a feature store (missing {path}.json)")
+    if header.get("version") != FEATURE_VECTOR_VERSION or header["dim"] != FEATURE_VECTOR_LENGTH:
+        raise ValueError(f"{path} was written with a different feature layout")
+    with open(path + ".index", 'r') as f:
+        paths = [line.rstrip("\n") for line in f][:header["rows"]]
+    if header["rows"] == 0:
+        return np.zeros((0, header["dim"]), dtype=np.float32), paths
+    return np.memmap(path, dtype=np.float32, mode='r', shape=(header["rows"], header["dim"])), paths
\ No newline at end of file
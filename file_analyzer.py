@@ -1,24 +1,119 @@
-from feature_extraction import extract_file_features
-from detection_methods import file_detection_methods
+from feature_extraction import FileFeatureAccumulator
+from detection_methods import file_detection_methods, file_detector_specs, create_streaming_detector
+from detector_registry import ProductContext, plan_detectors, should_short_circuit
+from profiling import create_profiler
+from result_cache import open_cache_entry, FEATURES_KEY
+from file_structure import read_file_structure
 
-def analyze_file(file_path, config):
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+def build_file_products(accumulator, config, file_path=None, file=None):
+    """Providers for the intermediates file detectors can declare; most come from the single streaming pass."""
+    return {
+        "byte_counts": lambda context: accumulator.byte_counts,
+        # Segment headers are read by seeking, not streamed
+        "file_structure": lambda context: read_file_structure(file if file is not None else file_path),
+        "config": lambda context: config,
+    }
+
+def _finalize_detector(method_name, spec, detector, features, products, cached_results, cache_entry, profiler):
+    if method_name in cached_results:
+        print(f"Using cached result for file analysis method: {method_name}")
+        return cached_results[method_name]
+    print(f"Applying file analysis method: {method_name}")
+    arguments = products.arguments(spec)
+    with profiler.stage(f"detector:{method_name}"):
+        result = detector.finalize(features, **arguments)
+    if cache_entry:
+        cache_entry.put(method_name, result, spec.version)
+    return result
+
+def analyze_file(file_path, config, file=None):
+    """Analyzes any file as a byte stream; 'file' is an already-open binary handle to reuse."""
     try:
-        with open(file_path, 'rb') as f:
-            file_content = f.read()
-        print(f"Loaded file: {file_path} ({len(file_content)} bytes)")
+        f = file if file is not None else open(file_path, 'rb')
     except FileNotFoundError:
         print(f"Error: File not found: {file_path}")
         return {}
-    except Exception as e:
+    except OSError as e:
         print(f"Error reading file: {e}")
         return {}
+    try:
+        return _analyze_open_file(file_path, f, config)
+    finally:
+        if file is None:
+            f.close()
 
-    features = extract_file_features(file_content)
+def _analyze_open_file(file_path, f, config):
+    profiler = create_profiler(config)
+    accumulator = FileFeatureAccumulator()
+    products = ProductContext(build_file_products(accumulator, config, file_path, f), profiler)
+    plan = plan_detectors(file_detection_methods, file_detector_specs,
+                          config.get('default_file_methods', []), products.providers)
+    features = None
+    cached_results = {}
+    with profiler.stage("cache_lookup"):
+        cache_entry = open_cache_entry(file_path, config, file=f)
+        if cache_entry:
+            features = cache_entry.get(FEATURES_KEY)
+            for method_name, method_func, spec in plan:
+                result = cache_entry.get(method_name, spec.version)
+                if result is not None:
+                    cached_results[method_name] = result
+
+    detectors = {method_name: create_streaming_detector(method_name)
+                 for method_name, method_func, spec in plan if method_name not in cached_results}
+    # Cached results and detectors that need nothing from the streaming pass come first, so
+    # when one of them meets suspicious_threshold the file is never read in full. Within each
+    # phase the cheapest methods come first; once one short-circuits the rest are not finalized.
+    phases = ([entry for entry in plan if entry[0] not in detectors or not detectors[entry[0]].needs_stream],
+              [entry for entry in plan if entry[0] in detectors and detectors[entry[0]].needs_stream])
     detection_results = {}
-    for method_name, method_func in file_detection_methods.items():
-        if method_name in config.get('default_file_methods', []):
-            print(f"Applying file analysis method: {method_name}")
-            result = method_func(file_content, features)
+    skipped_methods = []
+    short_circuited = False
+    for phase_index, phase in enumerate(phases):
+        if phase_index == 1 and not short_circuited and (features is None or phase):
+            # Files are streamed in fixed-size chunks so memory stays constant regardless of file size
+            chunk_size = config.get('file_chunk_size') or DEFAULT_CHUNK_SIZE
+            streamed = [detectors[method_name] for method_name, method_func, spec in phase]
+            try:
+                f.seek(0)
+                # One stage for the whole pass: per-chunk timing would cost more than the work
+                with profiler.stage("stream"):
+                    for chunk in iter(lambda: f.read(chunk_size), b''):
+                        accumulator.update(chunk)
+                        for detector in streamed:
+                            detector.update(chunk)
+                print(f"Loaded file: {file_path} ({accumulator.file_size} bytes)")
+            except Exception as e:
+                print(f"Error reading file: {e}")
+                return {}
+
+            if features is None:
+                with profiler.stage("features"):
+                    features = accumulator.finalize()
+                if cache_entry:
+                    cache_entry.put(FEATURES_KEY, features)
+
+        for method_name, method_func, spec in phase:
+            if short_circuited:
+                skipped_methods.append(method_name)
+                continue
+            result = _finalize_detector(method_name, spec, detectors.get(method_name), features, products,
+                                        cached_results, cache_entry, profiler)
             detection_results[method_name] = result
+            if should_short_circuit(result, config):
+                print(f"Suspicious threshold exceeded by {method_name}; skipping remaining methods.")
+                short_circuited = True
 
-    return {"file_type": "file", "features": features, "detection_results": detection_results}
\ No newline at end of file
+    detection_results = {name: detection_results[name] for name in file_detection_methods
+                         if name in detection_results}
+    analysis = {"file_type": "file", "features": features, "detection_results": detection_results}
+    if skipped_methods:
+        analysis["skipped_methods"] = skipped_methods
+    if cache_entry:
+        cache_entry.commit()
+        analysis["cache"] = cache_entry.stats()
+    if profiler.enabled:
+        analysis["profile"] = profiler.report()
+    return analysis
\ No newline at end of file
@@ -0,0 +1,225 @@
+import re
+import struct
+from statistical_analysis import calculate_histogram, calculate_entropy
+
+SAMPLE_BYTES = 65536  # Bytes read from each metadata segment and from trailing data for their entropy
+MAX_SEGMENTS = 65536  # Parsing stops (and reports it) after this many chunks/segments/blocks
+SCAN_CHUNK_SIZE = 65536  # Bytes searched at a time for the marker that ends JPEG entropy-coded data
+PADDING_BYTES = b'\x00\r\n\t '  # Trailing data made only of these is treated as padding
+
+# After SOS, the entropy-coded data ends at the first 0xFF not followed by a stuffed 0x00,
+# a restart marker or another fill 0xFF
+_JPEG_MARKER = re.compile(rb'\xff[^\x00\xd0-\xd7\xff]')
+_JPEG_MARKER_NAMES = {0xc4: "DHT", 0xc8: "JPG", 0xcc: "DAC", 0xd8: "SOI", 0xda: "SOS", 0xdb: "DQT",
+                      0xdc: "DNL", 0xdd: "DRI", 0xde: "DHP", 0xdf: "EXP", 0xfe: "COM"}
+_GIF_EXTENSIONS = {0x01: "plain_text", 0xf9: "graphic_control", 0xfe: "comment", 0xff: "application"}
+
+class _Inventory:
+    """Counts and sizes of each chunk/segment type, with the byte entropy of sampled metadata."""
+    def __init__(self):
+        self.entries = {}
+        self.histograms = {}
+        self.total = 0
+
+    def add(self, name, length, sample=None):
+        entry = self.entries.setdefault(name, {"type": name, "count": 0, "bytes": 0})
+        entry["count"] += 1
+        entry["bytes"] += length
+        self.total += 1
+        if sample is not None:
+            entry["metadata"] = True
+            if sample:
+                self.histograms[name] = self.histograms.get(name, 0) + calculate_histogram(sample)
+
+    def report(self):
+        for name, histogram in self.histograms.items():
+            self.entries[name]["entropy"] = float(calculate_entropy(histogram))
+        return list(self.entries.values())
+
+def _png_end(f, size, inventory, anomalies):
+    f.seek(8)
+    while inventory.total < MAX_SEGMENTS:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        length, chunk_type = struct.unpack('>I4s', header)
+        name = chunk_type.decode('latin-1')
+        start = f.tell()
+        # Ancillary chunks (lowercase first letter) hold metadata; critical ones hold the image
+        sample = f.read(min(length, SAMPLE_BYTES)) if chunk_type[0] & 0x20 else None
+        inventory.add(name, length, sample)
+        end = start + length + 4  # Data plus CRC
+        if end > size:
+            return None
+        f.seek(end)
+        if chunk_type == b'IEND':
+            return end
+    anomalies.append(f"more than {MAX_SEGMENTS} chunks; parsing stopped")
+    return None
+
+def _skip_entropy_coded_data(f):
+    """Seeks to the marker that ends the entropy-coded data at the current position; returns bytes skipped."""
+    start = f.tell()
+    while True:
+        position = f.tell()
+        chunk = f.read(SCAN_CHUNK_SIZE)
+        if not chunk:
+            return position - start
+        match = _JPEG_MARKER.search(chunk)
+        if match:
+            f.seek(position + match.start())
+            return position + match.start() - start
+        if chunk.endswith(b'\xff') and len(chunk) == SCAN_CHUNK_SIZE:
+            f.seek(-1, 1)  # The byte after it decides whether it starts a marker
+
+def _jpeg_marker_name(code):
+    if 0xe0 <= code <= 0xef:
+        return f"APP{code - 0xe0}"
+    if 0xc0 <= code <= 0xcf and code in _JPEG_MARKER_NAMES:
+        return _JPEG_MARKER_NAMES[code]
+    if 0xc0 <= code <= 0xcf:
+        return f"SOF{code - 0xc0}"
+    return _JPEG_MARKER_NAMES.get(code, f"0x{code:02X}")
+
+def _jpeg_end(f, size, inventory, anomalies):
+    f.seek(2)
+    while inventory.total < MAX_SEGMENTS:
+        marker = f.read(2)
+        if len(marker) < 2:
+            return None
+        if marker[0] != 0xff:
+            anomalies.append(f"invalid marker at offset {f.tell() - 2}")
+            return None
+        code = marker[1]
+        while code == 0xff:  # Fill bytes before a marker
+            byte = f.read(1)
+            if not byte:
+                return None
+            code = byte[0]
+        if code == 0xd9:  # EOI
+            return f.tell()
+        if 0xd0 <= code <= 0xd7 or code == 0x01:  # Markers without a length
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0] - 2
+        start = f.tell()
+        metadata = 0xe0 <= code <= 0xef or code == 0xfe  # APPn (EXIF, XMP, ICC, ...) and comments
+        sample = f.read(min(length, SAMPLE_BYTES)) if metadata else None
+        inventory.add(_jpeg_marker_name(code), length, sample)
+        end = start + length
+        if end > size:
+            return None
+        f.seek(end)
+        if code == 0xda:
+            inventory.add("scan_data", _skip_entropy_coded_data(f))
+    anomalies.append(f"more than {MAX_SEGMENTS} segments; parsing stopped")
+    return None
+
+def _gif_sub_blocks(f, sample=False):
+    """Skips a chain of data sub-blocks; returns (total bytes, sampled bytes or None)."""
+    total = 0
+    sampled = bytearray() if sample else None
+    while True:
+        size_byte = f.read(1)
+        if not size_byte:
+            raise EOFError
+        if size_byte[0] == 0:
+            return total, sampled
+        total += size_byte[0]
+        if sample and len(sampled) < SAMPLE_BYTES:
+            sampled += f.read(size_byte[0])
+        else:
+            f.seek(size_byte[0], 1)
+
+def _color_table_size(packed):
+    return 3 * 2 ** ((packed & 0x07) + 1) if packed & 0x80 else 0
+
+def _gif_end(f, size, inventory, anomalies):
+    f.seek(10)
+    packed = f.read(1)
+    if not packed:
+        return None
+    f.seek(13 + _color_table_size(packed[0]))
+    try:
+        while inventory.total < MAX_SEGMENTS:
+            block = f.read(1)
+            if not block:
+                return None
+            if block == b'\x3b':  # Trailer
+                return f.tell()
+            if block == b'\x21':
+                label = f.read(1)
+                if not label:
+                    return None
+                length, sample = _gif_sub_blocks(f, sample=True)
+                inventory.add(_GIF_EXTENSIONS.get(label[0], f"extension_0x{label[0]:02X}"), length, sample)
+            elif block == b'\x2c':
+                descriptor = f.read(9)
+                if len(descriptor) < 9:
+                    return None
+                f.seek(_color_table_size(descriptor[8]) + 1, 1)  # Local color table and LZW code size
+                inventory.add("image", _gif_sub_blocks(f)[0])
+            else:
+                anomalies.append(f"invalid block 0x{block[0]:02X} at offset {f.tell() - 1}")
+                return None
+            if f.tell() > size:
+                return None
+    except EOFError:
+        return None
+    anomalies.append(f"more than {MAX_SEGMENTS} blocks; parsing stopped")
+    return None
+
+_FORMATS = [
+    (b'\x89PNG\r\n\x1a\n', "png", _png_end),
+    (b'\xff\xd8', "jpeg", _jpeg_end),
+    (b'GIF87a', "gif", _gif_end),
+    (b'GIF89a', "gif", _gif_end),
+]
+
+def read_file_structure(file):
+    """Walks the chunk/segment/block headers of a PNG, JPEG or GIF file by seeking past their data.
+
+    'file' is a path or a binary file object, whose position is restored afterwards. Only
+    headers, sampled metadata and a sample of any data after the format's end marker
+    (IEND, EOI, trailer) are read. Returns None for other formats, otherwise a dict with
+    the segment inventory, where the format's data ends and what follows it.
+    """
+    if not hasattr(file, 'read'):
+        with open(file, 'rb') as f:
+            return _read_structure(f)
+    position = file.tell()
+    try:
+        return _read_structure(file)
+    finally:
+        file.seek(position)
+
+def _read_structure(f):
+    f.seek(0, 2)
+    size = f.tell()
+    f.seek(0)
+    header = f.read(8)
+    for magic, file_format, find_end in _FORMATS:
+        if header.startswith(magic):
+            break
+    else:
+        return None
+    inventory = _Inventory()
+    anomalies = []
+    data_end = find_end(f, size, inventory, anomalies)
+    structure = {"format": file_format, "file_size": size, "segments": inventory.report(),
+                 "metadata_bytes": sum(entry["bytes"] for entry in inventory.entries.values()
+                                       if entry.get("metadata")),
+                 "data_end": data_end, "trailing_bytes": 0, "trailing_entropy": None,
+                 "trailing_padding": False, "truncated": data_end is None, "anomalies": anomalies}
+    if data_end is None:
+        anomalies.append("no end marker found (truncated or malformed)")
+    elif data_end < size:
+        f.seek(data_end)
+        sample = f.read(SAMPLE_BYTES)
+        structure["trailing_bytes"] = size - data_end
+        structure["trailing_entropy"] = float(calculate_entropy(calculate_histogram(sample)))
+        structure["trailing_padding"] = size - data_end <= SAMPLE_BYTES and not sample.strip(PADDING_BYTES)
+        structure["trailing_header"] = sample[:8].hex()  # Often the signature of an appended file
+    return structure
\ No newline at end of file
@@ -0,0 +1,82 @@
+HEADER_SIZE = 512  # Enough for every signature below, including the tar magic at offset 257
+
+# (offset, magic, category, format), checked in order; the first match wins
+SIGNATURES = [
+    (0, b'\x89PNG\r\n\x1a\n', 'image', 'png'),
+    (0, b'\xff\xd8\xff', 'image', 'jpeg'),
+    (0, b'GIF87a', 'image', 'gif'),
+    (0, b'GIF89a', 'image', 'gif'),
+    (0, b'II*\x00', 'image', 'tiff'),
+    (0, b'MM\x00*', 'image', 'tiff'),
+    (0, b'BM', 'image', 'bmp'),
+    (0, b'\x00\x00\x01\x00', 'image', 'ico'),
+    (0, b'\x00\x00\x00\x0cjP  \r\n\x87\n', 'image', 'jpeg2000'),
+    (0, b'\xff\x4f\xff\x51', 'image', 'jpeg2000'),
+    (0, b'qoif', 'image', 'qoi'),
+    (0, b'8BPS', 'image', 'psd'),
+    (0, b'\x59\xa6\x6a\x95', 'image', 'sun_raster'),
+    (0, b'\x01\xda', 'image', 'sgi'),
+    (0, b'\x76\x2f\x31\x01', 'image', 'exr'),
+    (0, b'#define ', 'image', 'xbm'),
+    (0, b'PK\x03\x04', 'archive', 'zip'),
+    (0, b'PK\x05\x06', 'archive', 'zip'),
+    (0, b'\x1f\x8b', 'archive', 'gzip'),
+    (0, b'BZh', 'archive', 'bzip2'),
+    (0, b'\xfd7zXZ\x00', 'archive', 'xz'),
+    (0, b"7z\xbc\xaf'\x1c", 'archive', '7z'),
+    (0, b'Rar!\x1a\x07', 'archive', 'rar'),
+    (257, b'ustar', 'archive', 'tar'),
+    (0, b'fLaC', 'audio', 'flac'),
+    (0, b'OggS', 'audio', 'ogg'),
+    (0, b'ID3', 'audio', 'mp3'),
+    (0, b'MThd', 'audio', 'midi'),
+    (0, b'%PDF', 'container', 'pdf'),
+    (0, b'\x1aE\xdf\xa3', 'container', 'matroska'),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'container', 'ole'),
+]
+
+# Netpbm: 'P' and a type digit (plain text for 1-3, binary for 4-6) followed by whitespace
+NETPBM_TYPES = {b'1': 'pbm', b'4': 'pbm', b'2': 'pgm', b'5': 'pgm', b'3': 'ppm', b'6': 'ppm'}
+
+# RIFF and ISO base media files share a prefix; the subtype or brand decides the category
+RIFF_TYPES = {b'WEBP': ('image', 'webp'), b'WAVE': ('audio', 'wav'), b'AVI ': ('container', 'avi')}
+FTYP_BRANDS = {
+    b'avif': ('image', 'avif'), b'avis': ('image', 'avif'),
+    b'heic': ('image', 'heic'), b'heix': ('image', 'heic'), b'mif1': ('image', 'heif'),
+    b'M4A ': ('audio', 'm4a'), b'qt  ': ('container', 'quicktime'),
+}
+
+def sniff_file_type(header):
+    """Classifies a file from its first bytes; returns (category, format).
+
+    category is one of 'image', 'archive', 'audio', 'container' or 'file' (unknown).
+    """
+    if header[:4] == b'RIFF' and header[8:12] in RIFF_TYPES:
+        return RIFF_TYPES[header[8:12]]
+    if header[4:8] == b'ftyp':
+        return FTYP_BRANDS.get(header[8:12], ('container', 'mp4'))
+    # MPEG audio frames start with an 11-bit sync word
+    if len(header) >= 2 and header[0] == 0xff and header[1] & 0xe0 == 0xe0 and header[1] & 0x06:
+        if header[1] & 0x18 != 0x08:  # 0x08 is the reserved MPEG version
+            return ('audio', 'mp3')
+    if header[:1] == b'P' and header[1:2] in NETPBM_TYPES and len(header) > 2 and header[2] in b' \t\n\r':
+        return ('image', NETPBM_TYPES[header[1:2]])
+    for offset, magic, category, file_format in SIGNATURES:
+        if header[offset:offset + len(magic)] == magic:
+            return (category, file_format)
+    return ('file', 'unknown')
+
+def open_and_sniff(file_path):
+    """Opens a file once and classifies it from its header.
+
+    Returns (file object positioned at 0, category, format); the caller owns the file object.
+    """
+    f = open(file_path, 'rb')
+    try:
+        header = f.read(HEADER_SIZE)
+        f.seek(0)
+    except Exception:
+        f.close()
+        raise
+    category, file_format = sniff_file_type(header)
+    return f, category, file_format
\ No newline at end of file
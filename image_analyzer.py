@@ -1,10 +1,212 @@
+import math
+import os
 from PIL import Image
-from feature_extraction import extract_image_features
-from detection_methods import image_detection_methods
+from feature_extraction import (extract_image_features, extract_dct_features, extract_header_features,
+                                extract_feature_vector, FEATURE_VECTOR_VERSION)
+from classifier import feature_vectors_enabled
+from detection_methods import image_detection_methods, image_detector_specs, BitPlanes
+from detector_registry import ProductContext, plan_detectors, should_short_circuit, suspicion_score
+from profiling import create_profiler
+from result_cache import open_cache_entry, FEATURES_KEY
+from statistical_analysis import calculate_channel_histograms
+from utils import normalize_pixels, iter_frames
+from jpeg_dct import read_dct_coefficients
+from file_structure import read_file_structure
 
-def analyze_image(image_path, config):
+SCREENING_PREFIX = "screen:"  # Cache names of results computed on a reduced-resolution decode
+DCT_PREFIX = "dct:"  # Cache name of the features taken from DCT coefficients instead of pixels
+HEADER_PREFIX = "header:"  # Cache name of the features taken from the image header alone
+FEATURE_VECTOR_KEY = "__feature_vector__"
+# Vectors are always taken at full resolution, like the classifier's training vectors; the
+# suffix retires cached vectors of screened frames, which came from the reduced decode
+FEATURE_VECTOR_CACHE_VERSION = f"{FEATURE_VECTOR_VERSION}.full"
+# Products that never decode pixels; plans needing only these skip the RGB decode entirely
+PIXEL_FREE_PRODUCTS = {"dct_coefficients", "file_structure", "config", "source_path"}
+
+def _dct_within_limit(img, config):
+    """The coefficient reader is pure Python, roughly 1-2 s per megapixel on noisy JPEGs (PIL
+    decodes the pixels some 100 times faster), so larger images are not read from the DCT."""
+    max_pixels = config.get('dct_max_pixels')
+    return not max_pixels or img.size[0] * img.size[1] <= max_pixels
+
+def _read_dct_coefficients(img, image_path, file, config):
+    if img.format not in ("JPEG", "MPO") or img.tell() != 0:
+        return None
+    if not _dct_within_limit(img, config):
+        print(f"Not reading DCT coefficients of {image_path}: {img.size[0]}x{img.size[1]} exceeds dct_max_pixels")
+        return None
+    try:
+        return read_dct_coefficients(file if file is not None else image_path)
+    except ValueError as e:
+        print(f"Cannot read DCT coefficients of {image_path}: {e}")
+        return None
+
+def _read_file_structure(img, image_path, file):
+    if img.tell() != 0:  # Describes the whole file, so it is reported with the first frame only
+        return None
+    return read_file_structure(file if file is not None else image_path)
+
+def build_image_products(img, image_path, config, file=None):
+    """Providers for the intermediates image detectors can declare; each is computed at most once."""
+    return {
+        # Decode a single time; every extractor and detector shares this read-only array
+        "pixels": lambda context: normalize_pixels(img),
+        "channel_histograms": lambda context: calculate_channel_histograms(context.get("pixels")),
+        "bit_planes": lambda context: BitPlanes(context.get("pixels")),
+        # Horizontally adjacent sample pairs (u, v) as views of the shared pixels, no copy
+        "neighbor_pairs": lambda context: (context.get("pixels")[:, :-1], context.get("pixels")[:, 1:]),
+        # Quantized JPEG coefficients straight from the entropy-coded data; None for other formats
+        "dct_coefficients": lambda context: _read_dct_coefficients(img, image_path, file, config),
+        "file_structure": lambda context: _read_file_structure(img, image_path, file),
+        "feature_vector": lambda context: extract_feature_vector(
+            context.get("pixels"), context.get("channel_histograms"), context.get("neighbor_pairs")),
+        "config": lambda context: config,
+        "source_path": lambda context: image_path,
+    }
+
+def screening_scale(size, max_pixels):
+    """Power-of-two reduction that brings a frame of the given size under max_pixels (1 when it fits)."""
+    if not max_pixels or size[0] * size[1] <= max_pixels:
+        return 1
+    return 2 ** math.ceil(math.log2(math.sqrt(size[0] * size[1] / max_pixels)))
+
+def _open_image(image_path, file):
+    if file is not None:
+        file.seek(0)
+    return Image.open(file if file is not None else image_path)
+
+def _frame_features(img, products, cache_entry, profiler, key_prefix, pixel_free=False, header_only=False):
+    if header_only:
+        key_prefix += HEADER_PREFIX
+    elif pixel_free:
+        key_prefix += DCT_PREFIX
+    features = cache_entry.get(key_prefix + FEATURES_KEY) if cache_entry else None
+    if features is None:
+        with profiler.stage("features"):
+            dct_coefficients = products.get("dct_coefficients") if pixel_free and not header_only else None
+            if header_only:
+                features = extract_header_features(img)
+            elif dct_coefficients is not None:
+                features = extract_dct_features(dct_coefficients)
+            else:
+                features = extract_image_features(img, pixels=products.get("pixels"))
+        if cache_entry:
+            cache_entry.put(key_prefix + FEATURES_KEY, features)
+    return features
+
+def _feature_vector(products, cache_entry):
+    vector = cache_entry.get(FEATURE_VECTOR_KEY, FEATURE_VECTOR_CACHE_VERSION) if cache_entry else None
+    if vector is None:
+        vector = products.get("feature_vector")
+        if cache_entry:
+            cache_entry.put(FEATURE_VECTOR_KEY, vector, FEATURE_VECTOR_CACHE_VERSION)
+    return vector
+
+def _artifacts_exist(result):
+    """False when a (cached) result refers to an artifact file that has since been deleted."""
+    if isinstance(result, dict):
+        return all(os.path.exists(value) if key == "artifact" else _artifacts_exist(value)
+                   for key, value in result.items())
+    return True
+
+def _run_detectors(img, plan, products, features, config, cache_entry, profiler, key_prefix):
+    """Runs planned detectors cheapest first; returns (detection_results, skipped_methods, short_circuited)."""
+    detection_results = {}
+    skipped_methods = []
+    short_circuited = False
+    for method_name, method_func, spec in plan:
+        if short_circuited:
+            skipped_methods.append(method_name)
+            continue
+        result = cache_entry.get(key_prefix + method_name, spec.version) if cache_entry else None
+        if result is not None and not _artifacts_exist(result):
+            result = None  # Recompute to recreate the missing artifacts
+        if result is not None:
+            print(f"Using cached result for image analysis method: {method_name}")
+        else:
+            print(f"Applying image analysis method: {method_name}")
+            arguments = products.arguments(spec)
+            with profiler.stage(f"detector:{method_name}"):
+                result = method_func(img, features, **arguments)
+            if cache_entry:
+                cache_entry.put(key_prefix + method_name, result, spec.version)
+        detection_results[method_name] = result
+        if should_short_circuit(result, config):
+            print(f"Suspicious threshold exceeded by {method_name}; skipping remaining methods.")
+            short_circuited = True
+    return detection_results, skipped_methods, short_circuited
+
+def _screen_frame(img, image_path, file, config, plan, scale, single_frame, cache_entry, profiler, key_prefix):
+    """Runs the screening detectors on the current frame decoded directly at 1/scale.
+
+    Only single-frame images PIL can decode at reduced resolution (JPEG, through draft())
+    are screened; decoding other formats in full just to subsample them would cost as much
+    as the full-resolution pass. Returns None when the frame cannot be screened, else
+    (features, detection_results, flagged).
+    """
+    target = (max(1, img.size[0] // scale), max(1, img.size[1] // scale))
+    if not single_frame or not img.draft(img.mode, target):
+        return None
+    products = ProductContext(build_image_products(img, image_path, config, file), profiler)
+    print(f"Screening {image_path} at 1/{scale} resolution.")
+    features = _frame_features(img, products, cache_entry, profiler, key_prefix + SCREENING_PREFIX)
+    screening_plan = [entry for entry in plan if entry[2].screening]
+    results, _, _ = _run_detectors(img, screening_plan, products, features, config, cache_entry, profiler,
+                                   key_prefix + SCREENING_PREFIX)
+    threshold = config.get('screening_threshold', 0.2)
+    flagged = any((suspicion_score(result) or 0.0) >= threshold for result in results.values())
+    return features, results, flagged
+
+def _analyze_frame(img, image_path, file, config, plan, single_frame, with_vector, cache_entry, profiler,
+                   key_prefix):
+    """Features and detector results for the frame img is currently seeked to.
+
+    When every planned detector works from DCT coefficients or file structure alone, features
+    come from the coefficients (or just the header) and the frame is never decoded to pixels.
+    with_vector adds the classifier's 'feature_vector', always computed at full resolution.
+    """
+    frame_analysis = {}
+    scale = screening_scale(img.size, config.get('screening_max_pixels'))
+    screened = None
+    if scale > 1 and any(spec.screening for _, _, spec in plan):
+        screened = _screen_frame(img, image_path, file, config, plan, scale, single_frame, cache_entry, profiler,
+                                 key_prefix)
+    if screened is not None:
+        features, results, flagged = screened
+        frame_analysis["screening"] = {"scale": scale, "flagged": flagged, "methods": list(results)}
+        if not flagged:
+            # Only the screening detectors ran; the full-resolution ones are reported as skipped
+            frame_analysis.update(features=features, detection_results=results,
+                                  skipped_methods=[name for name, _, _ in plan if name not in results])
+            if with_vector:  # draft() changed how img decodes, so the vector needs a fresh image
+                full_img = _open_image(image_path, file)
+                products = ProductContext(build_image_products(full_img, image_path, config, file), profiler)
+                frame_analysis["feature_vector"] = _feature_vector(products, cache_entry)
+            return frame_analysis, False
+        print("Screening flagged the image; analyzing at full resolution.")
+        img = _open_image(image_path, file)  # draft() changed how img decodes, so start again from the file
+    products = ProductContext(build_image_products(img, image_path, config, file), profiler)
+    pixel_free = bool(plan) and all(set(spec.requires) <= PIXEL_FREE_PRODUCTS and "pixels" not in spec.optional
+                                    for _, _, spec in plan)
+    header_only = pixel_free and not any("dct_coefficients" in spec.requires for _, _, spec in plan)
+    if pixel_free and not header_only and not _dct_within_limit(img, config):
+        pixel_free = False  # Decoding the pixels is far cheaper than reading the coefficients
+    features = _frame_features(img, products, cache_entry, profiler, key_prefix, pixel_free, header_only)
+    detection_results, skipped_methods, short_circuited = _run_detectors(
+        img, plan, products, features, config, cache_entry, profiler, key_prefix)
+    frame_analysis.update(features=features, detection_results=detection_results)
+    if skipped_methods:
+        frame_analysis["skipped_methods"] = skipped_methods
+    if with_vector:
+        frame_analysis["feature_vector"] = _feature_vector(products, cache_entry)
+    return frame_analysis, short_circuited
+
+def analyze_image(image_path, config, file=None):
+    """Analyzes an image; 'file' is an already-open binary handle to reuse instead of reopening the path."""
+    profiler = create_profiler(config)
     try:
-        img = Image.open(image_path)
+        with profiler.stage("open"):
+            img = _open_image(image_path, file)
         print(f"Loaded image: {image_path} ({img.format}, {img.size})")
     except FileNotFoundError:
         print(f"Error: Image file not found: {image_path}")
@@ -13,12 +215,38 @@ def analyze_image(image_path, config):
         print(f"Error opening image: {e}")
         return {}
 
-    features = extract_image_features(img)
-    detection_results = {}
-    for method_name, method_func in image_detection_methods.items():
-        if method_name in config.get('default_image_methods', []):
-            print(f"Applying image analysis method: {method_name}")
-            result = method_func(img, features)
-            detection_results[method_name] = result
+    plan = plan_detectors(image_detection_methods, image_detector_specs,
+                          config.get('default_image_methods', []), build_image_products(img, image_path, config))
+    with profiler.stage("cache_lookup"):
+        cache_entry = open_cache_entry(image_path, config, file=file)
+    # Image.open only reads the header; frames are seeked and decoded one at a time
+    frame_count = getattr(img, "n_frames", 1)
+    frames = []
+    for index, frame in iter_frames(img, config.get('max_frames') or None):
+        if frame_count > 1:
+            print(f"Analyzing frame {index + 1} of {frame_count}.")
+        frame_analysis, short_circuited = _analyze_frame(
+            frame, image_path, file, config, plan, frame_count == 1, index == 0 and feature_vectors_enabled(config),
+            cache_entry, profiler,
+            f"frame{index}:" if index else "")
+        # Report in the configured method order regardless of execution order
+        results = frame_analysis["detection_results"]
+        frame_analysis["detection_results"] = {name: results[name] for name in image_detection_methods
+                                               if name in results}
+        frames.append(frame_analysis)
+        if short_circuited:
+            if index + 1 < frame_count:
+                print("Skipping the remaining frames.")
+            break
 
-    return {"file_type": "image", "features": features, "detection_results": detection_results}
\ No newline at end of file
+    analysis = {"file_type": "image", **frames[0]}
+    if frame_count > 1:
+        analysis["frame_count"] = frame_count
+        analysis["frames"] = [{"frame": index, **frame_analysis} for index, frame_analysis in enumerate(frames)
+                              if index > 0]
+    if cache_entry:
+        cache_entry.commit()
+        analysis["cache"] = cache_entry.stats()
+    if profiler.enabled:
+        analysis["profile"] = profiler.report()
+    return analysis
\ No newline at end of file
@@ -0,0 +1,342 @@
+import re
+from array import array
+import numpy as np
+
+# Position in the 8x8 block (row-major) of each coefficient in zigzag order
+ZIGZAG = np.array([
+    0, 1, 8, 16, 9, 2, 3, 10, 17, 24, 32, 25, 18, 11, 4, 5,
+    12, 19, 26, 33, 40, 48, 41, 34, 27, 20, 13, 6, 7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36, 29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46, 53, 60, 61, 54, 47, 55, 62, 63,
+])
+ZIGZAG_LIST = ZIGZAG.tolist()
+
+_SOF_BASELINE = (0xC0, 0xC1)  # Huffman-coded sequential DCT (baseline and extended)
+_SOF_UNSUPPORTED = {0xC2: "progressive", 0xC3: "lossless", 0xC5: "hierarchical", 0xC6: "hierarchical",
+                    0xC7: "hierarchical", 0xC9: "arithmetic", 0xCA: "arithmetic", 0xCB: "arithmetic",
+                    0xCD: "arithmetic", 0xCE: "arithmetic", 0xCF: "arithmetic"}
+_RESTART_MARKER = re.compile(b'\xff[\xd0-\xd7]')
+
+class DctCoefficients:
+    """Quantized DCT coefficients of a baseline JPEG, read without decoding pixels.
+
+    components: list of dicts with 'id', 'h', 'v' (sampling factors), 'quant_table'
+    (8x8 uint16, row-major) and 'blocks', an int16 array of shape (rows, cols, 64) holding
+    each block's coefficients in row-major (natural) order; index 0 is the DC term.
+    Component 0 is luminance for YCbCr images.
+    """
+    def __init__(self, width, height, components):
+        self.width = width
+        self.height = height
+        self.components = components
+
+    def ac_coefficients(self, component=None):
+        """Flat array of every AC coefficient, of one component or of all of them."""
+        selected = self.components if component is None else [self.components[component]]
+        return np.concatenate([entry["blocks"][:, :, 1:].ravel() for entry in selected])
+
+def _build_lookup(counts, symbols):
+    """Maps every 16-bit window to (code length, symbol) for a canonical Huffman table.
+
+    Windows that start with no valid code keep length 0.
+    """
+    lengths = [0] * 65536
+    values = [0] * 65536
+    code = 0
+    index = 0
+    for length in range(1, 17):
+        for _ in range(counts[length - 1]):
+            start = code << (16 - length)
+            end = (code + 1) << (16 - length)
+            if end > 65536:
+                raise ValueError("Invalid JPEG Huffman table")
+            lengths[start:end] = [length] * (end - start)
+            values[start:end] = [symbols[index]] * (end - start)
+            code += 1
+            index += 1
+        code <<= 1
+    return lengths, values
+
+def _read_huffman_tables(segment, huffman_tables):
+    pos = 0
+    while pos < len(segment):
+        table_class, table_id = segment[pos] >> 4, segment[pos] & 15
+        counts = list(segment[pos + 1:pos + 17])
+        symbols = list(segment[pos + 17:pos + 17 + sum(counts)])
+        huffman_tables[(table_class, table_id)] = _build_lookup(counts, symbols)
+        pos += 17 + sum(counts)
+
+def _decode_interval(data, plan, out, mcu_offsets):
+    """Entropy-decodes the MCUs of one restart interval into the per-component coefficient arrays.
+
+    plan holds one (component index, dc lookup, ac lookup) entry per block of an MCU, in
+    decoding order, and mcu_offsets the matching block offsets of every MCU to decode.
+    """
+    buf = data.replace(b'\xff\x00', b'\xff') + b'\x00\x00\x00\x00'
+    limit = (len(buf) - 4) * 8
+    pos = 0
+    predictions = [0] * len(out)
+    for offsets in mcu_offsets:
+        for (component, dc_lengths, dc_values, ac_lengths, ac_values), base in zip(plan, offsets):
+            coefficients = out[component]
+            b = pos >> 3
+            window = ((buf[b] << 16 | buf[b + 1] << 8 | buf[b + 2]) >> (8 - (pos & 7))) & 0xFFFF
+            length = dc_lengths[window]
+            if not length:
+                raise ValueError("Corrupt JPEG entropy-coded data (invalid DC code)")
+            size = dc_values[window]
+            pos += length
+            diff = 0
+            if size:
+                b = pos >> 3
+                window = ((buf[b] << 16 | buf[b + 1] << 8 | buf[b + 2]) >> (8 - (pos & 7))) & 0xFFFF
+                diff = window >> (16 - size)
+                pos += size
+                if diff < 1 << (size - 1):
+                    diff -= (1 << size) - 1
+            predictions[component] += diff
+            coefficients[base] = predictions[component]
+            k = 1
+            while k < 64:
+                b = pos >> 3
+                window = ((buf[b] << 16 | buf[b + 1] << 8 | buf[b + 2]) >> (8 - (pos & 7))) & 0xFFFF
+                length = ac_lengths[window]
+                if not length:
+                    raise ValueError("Corrupt JPEG entropy-coded data (invalid AC code)")
+                symbol = ac_values[window]
+                pos += length
+                size = symbol & 15
+                if not size:
+                    if symbol != 0xF0:  # End of block
+                        break
+                    k += 16
+                    continue
+                k += symbol >> 4
+                if k > 63:
+                    raise ValueError("Corrupt JPEG entropy-coded data (run past end of block)")
+                b = pos >> 3
+                window = ((buf[b] << 16 | buf[b + 1] << 8 | buf[b + 2]) >> (8 - (pos & 7))) & 0xFFFF
+                value = window >> (16 - size)
+                pos += size
+                if value < 1 << (size - 1):
+                    value -= (1 << size) - 1
+                coefficients[base + ZIGZAG_LIST[k]] = value
+                k += 1
+        if pos > limit:
+            raise ValueError("Truncated JPEG entropy-coded data")
+
+def _segments(data):
+    """Yields (marker, payload offset, payload length) for each marker segment up to the first SOS."""
+    if data[:2] != b'\xff\xd8':
+        raise ValueError("Not a JPEG file")
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xff:
+            raise ValueError(f"Corrupt JPEG marker at offset {pos}")
+        marker = data[pos + 1]
+        if marker == 0xff:  # Fill byte
+            pos += 1
+            continue
+        if marker == 0x01 or 0xd0 <= marker <= 0xd7:
+            pos += 2
+            continue
+        length = int.from_bytes(data[pos + 2:pos + 4], 'big')
+        yield marker, pos + 4, length - 2
+        pos += 2 + length
+    raise ValueError("Truncated JPEG header")
+
+def read_dct_coefficients(file):
+    """Reads the quantized DCT coefficients of a baseline (sequential, Huffman-coded) JPEG.
+
+    'file' is a path or a binary file object. Only the entropy-coded data is decoded (no
+    dequantization, IDCT or color conversion), in pure Python with 16-bit lookup tables.
+    Raises ValueError for progressive, lossless and arithmetic-coded files.
+    """
+    if hasattr(file, 'read'):
+        file.seek(0)
+        data = file.read()
+    else:
+        with open(file, 'rb') as f:
+            data = f.read()
+    try:
+        return _read_coefficients(data)
+    except (IndexError, KeyError, StopIteration):
+        raise ValueError("Corrupt or truncated JPEG") from None
+
+def _read_coefficients(data):
+    quant_tables = {}
+    huffman_tables = {}
+    components = None
+    restart_interval = 0
+    width = height = 0
+    for marker, start, length in _segments(data):
+        segment = data[start:start + length]
+        if marker == 0xdb:  # DQT
+            pos = 0
+            while pos < len(segment):
+                precision, table_id = segment[pos] >> 4, segment[pos] & 15
+                if precision:
+                    values = np.frombuffer(segment[pos + 1:pos + 129], dtype='>u2')
+                    pos += 129
+                else:
+                    values = np.frombuffer(segment[pos + 1:pos + 65], dtype=np.uint8)
+                    pos += 65
+                if len(values) != 64:
+                    raise ValueError("Truncated JPEG quantization table")
+                table = np.zeros(64, dtype=np.uint16)
+                table[ZIGZAG] = values  # Tables are stored in zigzag order
+                quant_tables[table_id] = table.reshape(8, 8)
+        elif marker == 0xc4:  # DHT
+            _read_huffman_tables(segment, huffman_tables)
+        elif marker == 0xdd:  # DRI
+            restart_interval = int.from_bytes(segment[:2], 'big')
+        elif marker in _SOF_UNSUPPORTED:
+            raise ValueError(f"Unsupported JPEG process: {_SOF_UNSUPPORTED[marker]}")
+        elif marker in _SOF_BASELINE:
+            height = int.from_bytes(segment[1:3], 'big')
+            width = int.from_bytes(segment[3:5], 'big')
+            components = []
+            for i in range(segment[5]):
+                component_id, sampling, table_id = segment[6 + 3 * i:9 + 3 * i]
+                components.append({"id": component_id, "h": sampling >> 4, "v": sampling & 15,
+                                   "quant_table_id": table_id})
+        elif marker == 0xda:  # SOS: the entropy-coded data follows the header
+            if components is None:
+                raise ValueError("JPEG scan before frame header")
+            scan_end = start + length
+            break
+    else:
+        raise ValueError("JPEG without image data")
+
+    if height == 0:
+        raise ValueError("JPEG with height defined by DNL is not supported")
+    h_max = max(c["h"] for c in components)
+    v_max = max(c["v"] for c in components)
+    mcus_x = -(-width // (8 * h_max))
+    mcus_y = -(-height // (8 * v_max))
+    for component in components:
+        component["rows"], component["cols"] = mcus_y * component["v"], mcus_x * component["h"]
+        component["coefficients"] = array('h', bytes(component["rows"] * component["cols"] * 128))
+
+    # Baseline files may hold one interleaved scan or one scan per component
+    pos = start
+    while True:
+        header = data[pos:pos + length]
+        scan_components = [next(c for c in components if c["id"] == header[1 + 2 * i])
+                           for i in range(header[0])]
+        selectors = [header[2 + 2 * i] for i in range(header[0])]
+        plan = []
+        for component, selector in zip(scan_components, selectors):
+            dc = huffman_tables[(0, selector >> 4)]
+            ac = huffman_tables[(1, selector & 15)]
+            plan_entry = (components.index(component), dc[0], dc[1], ac[0], ac[1])
+            plan.extend([plan_entry] * (component["h"] * component["v"] if len(scan_components) > 1 else 1))
+        mcu_offsets = _mcu_offsets(scan_components, width, height, h_max, v_max)
+        if len(scan_components) == 1:  # Padding blocks of the MCU grid are not coded in this scan
+            component = scan_components[0]
+            component["coded_rows"], component["coded_cols"] = _component_blocks(component, width, height,
+                                                                                   h_max, v_max)
+
+        # Entropy-coded data runs to the next marker that is neither stuffing nor a restart
+        data_end = scan_end
+        while True:
+            data_end = data.find(b'\xff', data_end)
+            if data_end < 0 or data_end + 1 >= len(data):
+                data_end = len(data)
+                break
+            if data[data_end + 1] == 0 or 0xd0 <= data[data_end + 1] <= 0xd7:
+                data_end += 2
+                continue
+            break
+        intervals = _RESTART_MARKER.split(data[scan_end:data_end])
+        out = [component["coefficients"] for component in components]
+        step = restart_interval or len(mcu_offsets)
+        for index, interval in enumerate(intervals):
+            chunk = mcu_offsets[index * step:(index + 1) * step]
+            if not chunk:
+                break
+            _decode_interval(interval, plan, out, chunk)
+
+        # Look for another scan (non-interleaved baseline files)
+        pos = data_end
+        next_scan = None
+        while pos + 4 <= len(data) and data[pos] == 0xff:
+            marker = data[pos + 1]
+            if marker == 0xd9:  # EOI
+                break
+            length = int.from_bytes(data[pos + 2:pos + 4], 'big')
+            if marker == 0xc4:
+                _read_huffman_tables(data[pos + 4:pos + 2 + length], huffman_tables)
+            elif marker == 0xdd:
+                restart_interval = int.from_bytes(data[pos + 4:pos + 6], 'big')
+            elif marker == 0xda:
+                next_scan = pos + 4
+                length -= 2
+                break
+            pos += 2 + length
+        if next_scan is None:
+            break
+        pos, scan_end = next_scan, next_scan + length
+
+    result = []
+    for component in components:
+        blocks = np.frombuffer(component["coefficients"], dtype=np.int16).reshape(
+            component["rows"], component["cols"], 64)
+        if "coded_rows" in component:
+            blocks = blocks[:component["coded_rows"], :component["coded_cols"]]
+        result.append({"id": component["id"], "h": component["h"], "v": component["v"],
+                       "quant_table": quant_tables.get(component["quant_table_id"]), "blocks": blocks})
+    return DctCoefficients(width, height, result)
+
+def _component_blocks(component, width, height, h_max, v_max):
+    """(rows, cols) of the blocks that cover a component's own samples, without MCU padding."""
+    component_width = -(-width * component["h"] // h_max)
+    component_height = -(-height * component["v"] // v_max)
+    return -(-component_height // 8), -(-component_width // 8)
+
+def _mcu_offsets(scan_components, width, height, h_max, v_max):
+    """Per MCU, the offset (in coefficients) of each block it contains, in decoding order."""
+    if len(scan_components) == 1:
+        # A non-interleaved scan covers only the component's own blocks, one block per MCU
+        component = scan_components[0]
+        rows, cols = _component_blocks(component, width, height, h_max, v_max)
+        return [((row * component["cols"] + col) * 64,) for row in range(rows) for col in range(cols)]
+    offsets = []
+    for mcu_row in range(-(-height // (8 * v_max))):
+        for mcu_col in range(-(-width // (8 * h_max))):
+            mcu = []
+            for component in scan_components:
+                for y in range(component["v"]):
+                    for x in range(component["h"]):
+                        row = mcu_row * component["v"] + y
+                        col = mcu_col * component["h"] + x
+                        mcu.append((row * component["cols"] + col) * 64)
+            offsets.append(tuple(mcu))
+    return offsets
+
+
+def _dct_matrix():
+    k = np.arange(8)
+    matrix = np.sqrt(2 / 8) * np.cos((2 * k[np.newaxis, :] + 1) * k[:, np.newaxis] * np.pi / 16)
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+DCT_MATRIX = _dct_matrix()  # Orthonormal 8-point DCT-II; rows are basis functions
+
+def decode_component(component):
+    """Dequantizes and inverse-transforms one component into 0-255 samples (no upsampling)."""
+    rows, cols = component["blocks"].shape[:2]
+    coefficients = component["blocks"].reshape(rows, cols, 8, 8) * component["quant_table"].astype(np.float32)
+    spatial = DCT_MATRIX.T @ coefficients @ DCT_MATRIX
+    plane = spatial.transpose(0, 2, 1, 3).reshape(rows * 8, cols * 8) + 128
+    return np.clip(np.round(plane), 0, 255)
+
+def encode_blocks(plane, quant_table):
+    """Forward DCT and quantization of a sample plane, the inverse of decode_component.
+
+    Partial blocks at the right and bottom edges are dropped. Returns int32 (rows, cols, 64).
+    """
+    rows, cols = plane.shape[0] // 8, plane.shape[1] // 8
+    blocks = plane[:rows * 8, :cols * 8].reshape(rows, 8, cols, 8).transpose(0, 2, 1, 3) - 128
+    coefficients = DCT_MATRIX @ blocks.astype(np.float32) @ DCT_MATRIX.T
+    return np.round(coefficients / quant_table).astype(np.int32).reshape(rows, cols, 64)
\ No newline at end of file
@@ -0,0 +1,162 @@
+import contextlib
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # POSIX only; without it (and /proc) RSS is not measured
+    resource = None
+
+# Upper bounds (seconds) of the wall-time histogram buckets, Prometheus style
+WALL_TIME_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def current_rss_bytes():
+    """Resident set size of this process; falls back to the peak RSS where /proc is unavailable.
+
+    Returns None when neither is available (e.g. on Windows).
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+class StageProfiler:
+    """Records wall time, CPU time and memory delta per named stage of one file's analysis.
+
+    Stages may nest (a detector asking for a product that is not computed yet); times are
+    recorded exclusive of nested stages so the per-stage numbers add up to the total.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}
+        self.stack = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        frame = {"child_wall": 0.0, "child_cpu": 0.0}
+        self.stack.append(frame)
+        rss_before = current_rss_bytes()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            rss_after = current_rss_bytes()
+            rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else 0
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1]["child_wall"] += wall
+                self.stack[-1]["child_cpu"] += cpu
+            entry = self.stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "rss_delta_bytes": 0})
+            entry["wall_seconds"] += wall - frame["child_wall"]
+            entry["cpu_seconds"] += cpu - frame["child_cpu"]
+            entry["rss_delta_bytes"] += rss_delta
+
+    def report(self):
+        return self.stages
+
+class NullProfiler:
+    """Stand-in used when profiling is disabled; every stage is a shared no-op context."""
+    enabled = False
+    _NULL_STAGE = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._NULL_STAGE
+
+    def report(self):
+        return None
+
+NULL_PROFILER = NullProfiler()
+
+def create_profiler(config):
+    return StageProfiler() if config.get('profiling') else NULL_PROFILER
+
+class RunMetrics:
+    """Aggregates per-file stage profiles across a run into histograms; safe to feed from several threads."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = 0
+        self.stages = {}
+
+    def _stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = {"buckets": [0] * len(WALL_TIME_BUCKETS), "count": 0, "wall_seconds": 0.0,
+                                 "cpu_seconds": 0.0, "max_rss_delta_bytes": 0}
+        return self.stages[name]
+
+    def observe(self, name, wall_seconds, cpu_seconds=0.0, rss_delta_bytes=0):
+        with self.lock:
+            stage = self._stage(name)
+            stage["count"] += 1
+            stage["wall_seconds"] += wall_seconds
+            stage["cpu_seconds"] += cpu_seconds
+            stage["max_rss_delta_bytes"] = max(stage["max_rss_delta_bytes"], rss_delta_bytes)
+            for i, bound in enumerate(WALL_TIME_BUCKETS):
+                if wall_seconds <= bound:
+                    stage["buckets"][i] += 1
+                    break
+
+    def add_profile(self, profile):
+        """Adds one file's StageProfiler.report() to the run totals."""
+        if not profile:
+            return
+        with self.lock:
+            self.files += 1
+        for name, entry in profile.items():
+            self.observe(name, entry["wall_seconds"], entry["cpu_seconds"], entry["rss_delta_bytes"])
+
+    def summary(self):
+        with self.lock:
+            return {name: {"count": stage["count"], "wall_seconds": stage["wall_seconds"],
+                           "cpu_seconds": stage["cpu_seconds"], "max_rss_delta_bytes": stage["max_rss_delta_bytes"]}
+                    for name, stage in self.stages.items()}
+
+    def to_prometheus(self):
+        """Renders the run totals in the Prometheus text exposition format."""
+        lines = [
+            "# HELP steganalysis_files_profiled_total Files analyzed with profiling enabled.",
+            "# TYPE steganalysis_files_profiled_total counter",
+            f"steganalysis_files_profiled_total {self.files}",
+            "# HELP steganalysis_stage_wall_seconds Wall time per analysis stage, excluding nested stages.",
+            "# TYPE steganalysis_stage_wall_seconds histogram",
+        ]
+        with self.lock:
+            stages = sorted(self.stages.items())
+            for name, stage in stages:
+                cumulative = 0
+                for bound, count in zip(WALL_TIME_BUCKETS, stage["buckets"]):
+                    cumulative += count
+                    lines.append(f'steganalysis_stage_wall_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'steganalysis_stage_wall_seconds_bucket{{stage="{name}",le="+Inf"}} {stage["count"]}')
+                lines.append(f'steganalysis_stage_wall_seconds_sum{{stage="{name}"}} {stage["wall_seconds"]}')
+                lines.append(f'steganalysis_stage_wall_seconds_count{{stage="{name}"}} {stage["count"]}')
+            lines.append("# HELP steganalysis_stage_cpu_seconds_total CPU time per analysis stage.")
+            lines.append("# TYPE steganalysis_stage_cpu_seconds_total counter")
+            for name, stage in stages:
+                lines.append(f'steganalysis_stage_cpu_seconds_total{{stage="{name}"}} {stage["cpu_seconds"]}')
+            lines.append("# HELP steganalysis_stage_max_rss_delta_bytes Largest RSS growth seen in one stage.")
+            lines.append("# TYPE steganalysis_stage_max_rss_delta_bytes gauge")
+            for name, stage in stages:
+                lines.append(f'steganalysis_stage_max_rss_delta_bytes{{stage="{name}"}} {stage["max_rss_delta_bytes"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary_path = path + ".tmp"
+        with open(temporary_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(temporary_path, path)  # Scrapers never see a half-written file
\ No newline at end of file
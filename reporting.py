@@ -1,26 +1,288 @@
+import csv
 import json
+import queue
+import threading
+import time
 from datetime import datetime
 import os  # Import the 'os' module
+import numpy as np
 
-def generate_report(input_file, analysis_results):
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    report_filename = f"steganalysis_report_{os.path.basename(input_file)}_{timestamp}.json"
+def json_default(obj):
+    """Serializes the NumPy values detectors return (scalars from chi-square, histogram arrays)."""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.hex()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
-    report_data = {
+def build_report_record(input_file, analysis_results):
+    return {
         "input_file": input_file,
-        "timestamp": timestamp,
-        "analysis_results": analysis_results
+        "timestamp": datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+        "analysis_results": analysis_results,
     }
 
+def _drop_partial_line(path):
+    """Truncates a last line torn by a crash mid-write, so appended records start on a line of their own."""
     try:
+        with open(path, 'rb+') as f:
+            position = f.seek(0, 2)
+            while position > 0:
+                step = min(65536, position)
+                position -= step
+                f.seek(position)
+                block = f.read(step)
+                index = block.rfind(b'\n')
+                if index >= 0:
+                    f.truncate(position + index + 1)
+                    return
+            f.truncate(0)
+    except FileNotFoundError:
+        pass
+
+class ReportSink:
+    """Destination for report records; write() is only ever called from one thread."""
+    def write(self, record):
+        raise NotImplementedError
+
+    def flush(self):
+        """Makes every record written so far durable (called before a scan journal checkpoint)."""
+        pass
+
+    def close(self):
+        pass
+
+class JsonFileSink(ReportSink):
+    """One indented JSON file per input, the original report layout."""
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write(self, record):
+        base = f"steganalysis_report_{os.path.basename(record['input_file'])}_{record['timestamp']}"
+        report_filename = os.path.join(self.output_dir, base + ".json")
+        counter = 1
+        while os.path.exists(report_filename):  # Same name scanned twice within one second
+            report_filename = os.path.join(self.output_dir, f"{base}_{counter}.json")
+            counter += 1
         with open(report_filename, 'w') as f:
-            json.dump(report_data, f, indent=4)
+            json.dump(record, f, indent=4, default=json_default)
+        return report_filename
+
+class JsonLinesSink(ReportSink):
+    """All records appended as compact JSON, one per line, to a single buffered file."""
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        _drop_partial_line(path)
+        self.file = open(path, 'a', buffering=1024 * 1024)
+
+    def write(self, record):
+        self.file.write(json.dumps(record, separators=(',', ':'), default=json_default))
+        self.file.write('\n')
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+# Columns of the tabular sinks; nested results are stored as compact JSON strings
+TABLE_COLUMNS = ["input_file", "timestamp", "file_type", "category", "format", "features", "detection_results",
+                 "classifier"]
+
+def _table_row(record):
+    results = record.get("analysis_results") or {}
+    detected = results.get("detected_type", {})
+    return {
+        "input_file": record["input_file"],
+        "timestamp": record["timestamp"],
+        "file_type": results.get("file_type"),
+        "category": detected.get("category"),
+        "format": detected.get("format"),
+        "features": json.dumps(results.get("features"), separators=(',', ':'), default=json_default),
+        "detection_results": json.dumps(results.get("detection_results"), separators=(',', ':'),
+                                        default=json_default),
+        "classifier": json.dumps(results.get("classifier"), separators=(',', ':'), default=json_default),
+    }
+
+class CsvSink(ReportSink):
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _drop_partial_line(path)
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'a', newline='', buffering=1024 * 1024)
+        self.writer = csv.DictWriter(self.file, fieldnames=TABLE_COLUMNS)
+        if write_header:
+            self.writer.writeheader()
+
+    def write(self, record):
+        self.writer.writerow(_table_row(record))
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+class ParquetSink(ReportSink):
+    """Buffers rows and writes them as Parquet row groups; requires the optional pyarrow package.
+
+    Rows go to <run_name>.parquet, then <run_name>_part1.parquet, ... A Parquet file is only
+    readable once its footer is written, so flush() closes and fsyncs the current part and
+    the next write starts a new one; existing parts (e.g. of a resumed run) are never reopened.
+    """
+    def __init__(self, output_dir, run_name, row_group_size=10000):
+        import pyarrow  # Imported lazily so pyarrow stays optional
+        import pyarrow.parquet
+        os.makedirs(output_dir, exist_ok=True)
+        self.pa = pyarrow
+        self.output_dir = output_dir
+        self.run_name = run_name
+        self.schema = pyarrow.schema([(name, pyarrow.string()) for name in TABLE_COLUMNS])
+        self.writer = None
+        self.path = None
+        self.row_group_size = row_group_size
+        self.rows = []
+
+    def _next_part_path(self):
+        path = os.path.join(self.output_dir, self.run_name + ".parquet")
+        part = 1
+        while os.path.exists(path):
+            path = os.path.join(self.output_dir, f"{self.run_name}_part{part}.parquet")
+            part += 1
+        return path
+
+    def write(self, record):
+        self.rows.append(_table_row(record))
+        if len(self.rows) >= self.row_group_size:
+            self._write_rows()
+
+    def _write_rows(self):
+        if self.rows:
+            if self.writer is None:
+                self.path = self._next_part_path()
+                self.writer = self.pa.parquet.ParquetWriter(self.path, self.schema)
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def flush(self):
+        self._write_rows()
+        if self.writer is not None:
+            self.writer.close()  # Writes the footer
+            self.writer = None
+            with open(self.path, 'rb') as f:
+                os.fsync(f.fileno())
+
+    def close(self):
+        self._write_rows()
+        if self.writer is not None:
+            self.writer.close()
+
+def default_run_name():
+    return f"steganalysis_reports_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+
+def create_report_sink(config, run_name=None):
+    """Builds the sink named by config['report_format']: 'json', 'jsonl', 'csv' or 'parquet'.
+
+    JSON Lines and CSV reports of an existing run_name are appended to; Parquet files
+    cannot be, so later rows go to numbered part files alongside (see ParquetSink).
+    """
+    output_dir = config.get('report_output_dir', 'reports')
+    report_format = config.get('report_format', 'jsonl')
+    run_name = run_name or default_run_name()
+    if report_format == 'json':
+        return JsonFileSink(output_dir)
+    if report_format == 'csv':
+        return CsvSink(os.path.join(output_dir, run_name + ".csv"))
+    if report_format == 'parquet':
+        try:
+            return ParquetSink(output_dir, run_name)
+        except ImportError:
+            print("pyarrow is not installed; writing JSON Lines reports instead.")
+    elif report_format != 'jsonl':
+        print(f"Unknown report_format '{report_format}'; writing JSON Lines reports instead.")
+    return JsonLinesSink(os.path.join(output_dir, run_name + ".jsonl"))
+
+class BackgroundReportWriter:
+    """Writes records to a sink from a background thread so analysis never waits on report I/O.
+
+    The queue is bounded: when the disk cannot keep up, submit() blocks instead of
+    letting pending records grow without limit. When a RunMetrics is given, the time
+    spent in each sink write is recorded as the 'report' stage.
+    """
+    _STOP = object()
+
+    def __init__(self, sink, max_pending=1024, metrics=None):
+        self.sink = sink
+        self.metrics = metrics
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            if record is self._STOP:
+                break
+            if isinstance(record, threading.Event):  # Flush request from flush()
+                try:
+                    self.sink.flush()
+                except Exception as e:
+                    print(f"Error flushing reports: {e}")
+                record.set()
+                continue
+            try:
+                start = time.perf_counter()
+                self.sink.write(record)
+                if self.metrics:
+                    self.metrics.observe("report", time.perf_counter() - start)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error saving report for {record.get('input_file')}: {e}")
+
+    def submit(self, input_file, analysis_results):
+        self.queue.put(build_report_record(input_file, analysis_results))
+
+    def flush(self):
+        """Blocks until every record submitted so far has been written and flushed by the sink."""
+        flushed = threading.Event()
+        self.queue.put(flushed)
+        flushed.wait()
+
+    def close(self):
+        self.queue.put(self._STOP)
+        self.thread.join()
+        self.sink.close()
+
+def generate_report(input_file, analysis_results, config=None, verbose=False):
+    """Writes a single per-file JSON report into report_output_dir; prints the results when verbose."""
+    config = config or {}
+    record = build_report_record(input_file, analysis_results)
+    try:
+        report_filename = JsonFileSink(config.get('report_output_dir', 'reports')).write(record)
         print(f"Report saved to: {report_filename}")
     except Exception as e:
         print(f"Error saving report: {e}")
 
-    print("\n--- Analysis Report ---")
-    print(f"Input File: {input_file}")
-    print(f"Timestamp: {timestamp}")
-    print("\nAnalysis Results:")
-    print(json.dumps(analysis_results, indent=4))
\ No newline at end of file
+    if verbose:
+        print("\n--- Analysis Report ---")
+        print(f"Input File: {input_file}")
+        print(f"Timestamp: {record['timestamp']}")
+        print("\nAnalysis Results:")
+        print(json.dumps(analysis_results, indent=4, default=json_default))
\ No newline at end of file
@@ -0,0 +1,207 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+import sqlite3
+import time
+
+HASH_CHUNK_SIZE = 1024 * 1024
+FEATURES_KEY = "__features__"
+EVICTION_CHECK_INTERVAL = 100  # Puts between total-size checks
+LOCK_TIMEOUT_SECONDS = 2  # Writes are single short transactions, so a longer wait means contention; skip instead
+
+# Config keys that only affect scheduling, output or method selection, never a detector's result
+_NON_RESULT_KEYS = {
+    "default_image_methods", "default_file_methods", "report_output_dir",
+    "batch_workers", "batch_max_in_flight", "batch_file_timeout", "file_chunk_size",
+    "result_cache_path", "result_cache_max_bytes",
+    "report_format", "profiling", "metrics_path",
+    "classifier_model_path", "feature_store_path", "classifier_batch_size",
+    "server_host", "server_port", "server_socket_path", "server_workers", "server_max_queue",
+    "server_max_upload_bytes", "server_spool_dir",
+    "container_max_depth", "container_max_members", "container_max_member_bytes", "container_max_total_bytes",
+    "scan_journal_path", "journal_checkpoint_seconds",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_digests (
+    path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, sha256 TEXT);
+CREATE TABLE IF NOT EXISTS results (
+    cache_key TEXT PRIMARY KEY, payload BLOB, size INTEGER, last_access REAL);
+CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+"""
+
+def config_fingerprint(config):
+    """Short hash of the config values that can change detector output."""
+    relevant = {k: v for k, v in config.items() if k not in _NON_RESULT_KEYS}
+    encoded = json.dumps(relevant, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+def hash_file(file_path, file=None):
+    """SHA-256 of a file; an open handle is read from the start and rewound afterwards."""
+    digest = hashlib.sha256()
+    if file is not None:
+        file.seek(0)
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        file.seek(0)
+        return digest.hexdigest()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ResultCache:
+    """SQLite-backed store of detector results keyed by file content, with size-based LRU eviction.
+
+    The cache is shared by concurrent worker processes, so every write is its own short
+    transaction (the connection autocommits) and last-access times are batched until
+    commit(). When the database stays locked, a lookup counts as a miss and a store is skipped.
+    """
+    def __init__(self, path, max_bytes):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.pid = os.getpid()
+        self.connection = sqlite3.connect(path, timeout=LOCK_TIMEOUT_SECONDS, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_SCHEMA)
+        self.puts_since_check = 0
+        self.accessed = {}  # cache_key -> last access time, written at commit()
+
+    def file_digest(self, file_path, file=None):
+        """Returns the SHA-256 of a file, rehashing only when (size, mtime, inode) changed."""
+        try:
+            stat = os.fstat(file.fileno()) if file is not None else os.stat(file_path)
+        except io.UnsupportedOperation:
+            return hash_file(file_path, file)  # In-memory container members are keyed by content alone
+        path = os.path.abspath(file_path)
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, inode, sha256 FROM file_digests WHERE path = ?", (path,)).fetchone()
+        if row and tuple(row[:3]) == (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+            return row[3]
+        sha256 = hash_file(file_path, file)
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO file_digests VALUES (?, ?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, stat.st_ino, sha256))
+        except sqlite3.OperationalError as e:  # Locked by another worker; the file is rehashed next time
+            print(f"Result cache busy, digest not stored: {e}")
+        return sha256
+
+    def get(self, cache_key):
+        try:
+            row = self.connection.execute(
+                "SELECT payload FROM results WHERE cache_key = ?", (cache_key,)).fetchone()
+        except sqlite3.OperationalError as e:
+            print(f"Result cache busy, treating as a miss: {e}")
+            return None
+        if row is None:
+            return None
+        self.accessed[cache_key] = time.time()
+        return pickle.loads(row[0])
+
+    def put(self, cache_key, result):
+        payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (cache_key, payload, len(payload), time.time()))
+        except sqlite3.OperationalError as e:
+            print(f"Result cache busy, result not stored: {e}")
+            return
+        self.accessed.pop(cache_key, None)
+        self.puts_since_check += 1
+        if self.puts_since_check >= EVICTION_CHECK_INTERVAL:
+            self.evict()
+
+    def evict(self):
+        """Drops least recently used results until the cache is back under max_bytes."""
+        self.puts_since_check = 0
+        try:
+            total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - self.max_bytes
+            doomed = []
+            for cache_key, size in self.connection.execute(
+                    "SELECT cache_key, size FROM results ORDER BY last_access"):
+                doomed.append((cache_key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            with self.connection:  # One transaction for the whole batch of deletes
+                self.connection.execute("BEGIN")
+                self.connection.executemany("DELETE FROM results WHERE cache_key = ?", doomed)
+        except sqlite3.OperationalError as e:
+            print(f"Result cache busy, eviction postponed: {e}")
+
+    def commit(self):
+        """Writes the batched last-access times in one short transaction."""
+        if not self.accessed:
+            return
+        accessed = [(last_access, cache_key) for cache_key, last_access in self.accessed.items()]
+        self.accessed = {}
+        try:
+            with self.connection:
+                self.connection.execute("BEGIN")
+                self.connection.executemany("UPDATE results SET last_access = ? WHERE cache_key = ?", accessed)
+        except sqlite3.OperationalError as e:  # Only the LRU order suffers
+            print(f"Result cache busy, access times not updated: {e}")
+
+class FileCacheEntry:
+    """Cache view for one file: resolves method names to keys and counts hits and misses."""
+    def __init__(self, cache, digest, fingerprint):
+        self.cache = cache
+        self.digest = digest
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, method_name, version):
+        return f"{self.digest}:{method_name}:{version}:{self.fingerprint}"
+
+    def get(self, method_name, version=1):
+        """Looks up a result; 'version' comes from the detector's DetectorSpec."""
+        result = self.cache.get(self._key(method_name, version))
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, method_name, result, version=1):
+        self.cache.put(self._key(method_name, version), result)
+
+    def commit(self):
+        self.cache.commit()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+_result_cache = None
+
+def get_result_cache(config):
+    """Returns this process's ResultCache, or None when 'result_cache_path' is not configured."""
+    global _result_cache
+    path = config.get('result_cache_path')
+    if not path:
+        return None
+    # Worker processes forked from a parent must not reuse its SQLite connection
+    if _result_cache is None or _result_cache.path != path or _result_cache.pid != os.getpid():
+        _result_cache = ResultCache(path, config.get('result_cache_max_bytes') or 512 * 1024 * 1024)
+    return _result_cache
+
+def open_cache_entry(file_path, config, file=None):
+    """Returns a FileCacheEntry for the file, or None when caching is disabled or the file is unreadable."""
+    cache = get_result_cache(config)
+    if cache is None:
+        return None
+    try:
+        digest = cache.file_digest(file_path, file)
+    except OSError:
+        return None
+    return FileCacheEntry(cache, digest, config_fingerprint(config))
\ No newline at end of file
@@ -0,0 +1,149 @@
+import json
+import os
+import sqlite3
+import time
+from result_cache import config_fingerprint
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS run (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, status TEXT, file_type TEXT, methods TEXT,
+    fingerprint TEXT);
+CREATE TABLE IF NOT EXISTS directories (path TEXT PRIMARY KEY, mtime_ns INTEGER);
+"""
+
+class ScanJournal:
+    """SQLite record of a bulk scan: which inputs completed, with which detectors, and its report set.
+
+    mode is "new" (forget the previous run), "resume" (skip inputs already completed and
+    unchanged) or "changed" (like resume, but the files of directories whose mtime is
+    unchanged since the last completed run are checked against the journal with one ranged
+    query per directory, without a lookup or stat per file). Completions are committed at
+    checkpoints, after the caller has made their reports durable, so a crash repeats at
+    most the inputs completed since the last checkpoint (whose report rows may then
+    appear twice).
+    """
+    def __init__(self, path, config, mode="new"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(_SCHEMA)
+        self.fingerprint = config_fingerprint(config)
+        self.methods = {"image": set(config.get('default_image_methods', [])),
+                        "file": set(config.get('default_file_methods', []))}
+        self.checkpoint_seconds = config.get('journal_checkpoint_seconds', 30)
+        self.last_checkpoint = time.monotonic()
+        self.directory_mtimes = {}
+        self.trusted = set()  # Files of the directory being listed that need no stat (see note_directory)
+        self.changed_only = mode == "changed"
+        self.run_name = self._get("run_name")
+        if mode == "new" or self.run_name is None:
+            if mode != "new":
+                print("The scan journal has no previous run; starting a new one.")
+            self.changed_only = False
+            self.run_name = None
+            self.connection.execute("DELETE FROM files")
+            self.connection.execute("DELETE FROM directories")
+            self.connection.commit()
+        else:
+            print(f"Resuming scan {self.run_name}.")
+
+    def _get(self, key):
+        row = self.connection.execute("SELECT value FROM run WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO run VALUES (?, ?)", (key, value))
+
+    def start(self, run_name):
+        """Names the report set of a new run; resumed runs keep appending to theirs."""
+        self.run_name = run_name
+        self._set("run_name", run_name)
+        self.connection.commit()
+
+    def note_directory(self, directory, names):
+        """Notes a listed directory's mtime and, in "changed" mode, which of its files can be trusted.
+
+        An unchanged mtime means no file was added, removed or renamed since the last completed
+        run, so the listed files with a completed row (one ranged query for the directory) are
+        complete without a stat each. Files without a row, e.g. because their worker died before
+        they were recorded, are still checked and scanned. Files rewritten in place keep their
+        directory's mtime and so are trusted too; "resume" mode stats every file and catches them.
+        """
+        self.trusted = set()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        path = os.path.abspath(directory)
+        self.directory_mtimes[path] = mtime_ns
+        if not self.changed_only:
+            return
+        row = self.connection.execute("SELECT mtime_ns FROM directories WHERE path = ?", (path,)).fetchone()
+        if row is None or row[0] != mtime_ns:
+            return
+        # Every path below the directory sorts between "path/" and "path0" ('0' follows the separator)
+        prefix = os.path.join(path, '')
+        rows = self.connection.execute(
+            "SELECT path, status, file_type, methods, fingerprint FROM files WHERE path >= ? AND path < ?",
+            (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)))
+        completed = {row[0] for row in rows if os.path.dirname(row[0]) == path and self._row_current(row[1:])}
+        self.trusted = {os.path.join(path, name) for name in names} & completed
+
+    def is_complete(self, file_path):
+        """True when the file was completed with the current configuration and has not changed since."""
+        path = os.path.abspath(file_path)
+        if path in self.trusted:
+            return True
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, status, file_type, methods, fingerprint FROM files WHERE path = ?",
+            (path,)).fetchone()
+        if row is None or not self._row_current(row[2:]):
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        return (row[0], row[1]) == (stat.st_size, stat.st_mtime_ns)
+
+    def _row_current(self, row):
+        """(status, file_type, methods, fingerprint): completed with the current detectors and configuration."""
+        status, file_type, methods, fingerprint = row
+        # Failures and timeouts are retried: the cause (e.g. a too short --timeout) may be gone
+        if status != "done" or file_type is None or fingerprint != self.fingerprint:
+            return False
+        return self.methods.get(file_type, set()) <= set(json.loads(methods))
+
+    def record(self, outcome):
+        """Marks a scanned file as completed; it becomes durable at the next commit()."""
+        results = outcome["analysis_results"] or {}
+        if outcome["timed_out"]:
+            status = "timed_out"
+        elif outcome["error"] or not results:  # An empty result means the analyzer could not read the file
+            status = "failed"
+        else:
+            status = "done"
+        methods = list(results.get("detection_results", {})) + results.get("skipped_methods", [])
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(outcome["input_file"]), outcome["size"], outcome.get("mtime_ns"), status,
+             results.get("file_type"), json.dumps(methods), self.fingerprint))
+
+    def checkpoint_due(self):
+        return time.monotonic() - self.last_checkpoint >= self.checkpoint_seconds
+
+    def commit(self):
+        self.connection.commit()
+        self.last_checkpoint = time.monotonic()
+
+    def finish(self):
+        """Records the directory mtimes of a run that walked all its inputs, for later "changed" runs."""
+        self.connection.executemany("INSERT OR REPLACE INTO directories VALUES (?, ?)",
+                                    self.directory_mtimes.items())
+        self._set("completed", str(time.time()))
+        self.commit()
+
+    def close(self):
+        self.connection.close()
\ No newline at end of file
@@ -1,14 +1,239 @@
+import functools
+import math
 import numpy as np
-from collections import Counter
+
+HISTOGRAM_BINS = 256
+
+def _as_array(data):
+    """Views raw bytes as uint8 without copying; arrays are passed through."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return np.frombuffer(data, dtype=np.uint8)
+    return np.asarray(data)
 
 def calculate_histogram(data):
-    """Calculates the histogram of the given data."""
-    return Counter(data)
+    """Calculates the dense 256-bin histogram of the given bytes or uint8 array."""
+    values = _as_array(data).ravel()
+    return np.bincount(values, minlength=HISTOGRAM_BINS)
+
+def calculate_channel_histograms(pixels):
+    """Calculates one 256-bin histogram per channel of an (H, W, C) array, shape (C, 256).
+
+    Each channel's values are offset into a bin range of their own, so one bincount covers every channel.
+    """
+    channels = pixels.shape[-1] if pixels.ndim == 3 else 1
+    flat = pixels.reshape(-1, channels)
+    offsets = np.arange(channels, dtype=np.intp) * HISTOGRAM_BINS  # bincount indexes with intp anyway
+    # Channel-major, so each channel's values are counted in one contiguous run
+    index = np.empty((channels, len(flat)), dtype=np.intp)
+    np.add(flat.T, offsets[:, np.newaxis], out=index)
+    return np.bincount(index.ravel(), minlength=channels * HISTOGRAM_BINS).reshape(channels, HISTOGRAM_BINS)
 
 def calculate_chi_square(observed, expected):
     """Calculates the chi-square statistic."""
-    if len(observed) != len(expected) or any(v == 0 for v in expected):
+    observed = np.asarray(observed, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    if observed.shape != expected.shape or np.any(expected == 0):
         return float('inf')  # Or handle division by zero appropriately
-    return np.sum([(o - e)**2 / e for o, e in zip(observed, expected)])
+    return float(np.sum((observed - expected) ** 2 / expected))
+
+def calculate_entropy(histogram):
+    """Calculates the Shannon entropy (bits per symbol) of a histogram.
+
+    A 2D histogram such as the output of calculate_channel_histograms yields one
+    entropy per row.
+    """
+    counts = np.asarray(histogram, dtype=np.float64)
+    totals = counts.sum(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probabilities = np.where(totals > 0, counts / totals, 0.0)
+        terms = np.where(probabilities > 0, probabilities * np.log2(probabilities), 0.0)
+    entropy = -terms.sum(axis=-1)
+    return float(entropy) if entropy.ndim == 0 else entropy
+
+def calculate_block_histograms(data, block_size):
+    """256-bin histograms of consecutive block_size-byte blocks, shape (len(data) // block_size, 256).
+
+    A trailing partial block is ignored. One bincount covers every block.
+    """
+    values = _as_array(data)
+    blocks = len(values) // block_size
+    if blocks == 0:
+        return np.zeros((0, HISTOGRAM_BINS), dtype=np.int64)
+    offsets = (np.arange(blocks, dtype=np.int32) * HISTOGRAM_BINS)[:, np.newaxis]
+    index = values[:blocks * block_size].reshape(blocks, block_size) + offsets
+    return np.bincount(index.ravel(), minlength=blocks * HISTOGRAM_BINS).reshape(blocks, HISTOGRAM_BINS)
+
+@functools.lru_cache(maxsize=8)
+def _xlog2x_table(size):
+    """c * log2(c) for every count c in 0..size, so window entropies are table lookups."""
+    counts = np.arange(size + 1, dtype=np.float64)
+    counts[0] = 1.0  # 0 * log2(0) is taken as 0
+    table = counts * np.log2(counts)
+    table[0] = 0.0
+    return table
+
+def calculate_rolling_window_stats(block_histograms, window_blocks, carry=None):
+    """Entropy and uniformity chi-square of sliding windows of window_blocks consecutive blocks.
+
+    Window counts are rolled forward from cumulative block counts (adding the block that
+    enters, subtracting the one that leaves) rather than recounted per window. carry holds
+    the last window_blocks - 1 histograms of the previous call, so windows span calls.
+    Returns (entropies, chi2, new carry), one statistic per window that ends in block_histograms.
+    """
+    if carry is not None and len(carry):
+        block_histograms = np.concatenate((carry, block_histograms))
+    # 32-bit running sums are several times faster along this axis whenever they cannot overflow
+    dtype = np.int32 if block_histograms.sum() < 2 ** 31 else np.int64
+    cumulative = np.zeros((len(block_histograms) + 1, HISTOGRAM_BINS), dtype=dtype)
+    np.cumsum(block_histograms, axis=0, dtype=dtype, out=cumulative[1:])
+    counts = cumulative[window_blocks:] - cumulative[:-window_blocks]
+    new_carry = block_histograms[max(0, len(block_histograms) - window_blocks + 1):]
+    if len(counts) == 0:
+        return np.zeros(0), np.zeros(0), new_carry
+    window_size = int(counts[0].sum())
+    expected = window_size / HISTOGRAM_BINS
+    entropies = np.log2(window_size) - _xlog2x_table(window_size)[counts].sum(axis=1) / window_size
+    chi2 = np.square(counts, dtype=np.float64).sum(axis=1) / expected - window_size
+    return entropies, chi2, new_carry
+
+def calculate_pairs_of_values_chi_square(histograms, min_expected=0):
+    """Westfeld-Pfitzmann pairs-of-values chi-square over the last axis of 256-bin histograms.
+
+    LSB replacement equalizes the counts of each value pair (2k, 2k+1), which drives the
+    statistic towards zero. Leading axes are kept, so a stack of per-block histograms is
+    tested in one call. Returns (chi2, degrees_of_freedom); pairs whose expected count is
+    not above min_expected are skipped.
+    """
+    counts = np.asarray(histograms, dtype=np.float64)
+    even = counts[..., 0::2]
+    expected = (even + counts[..., 1::2]) / 2.0
+    observed_pairs = expected > min_expected
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(observed_pairs, (even - expected) ** 2 / expected, 0.0)
+    return terms.sum(axis=-1), observed_pairs.sum(axis=-1) - 1
+
+def chi_square_survival(statistic, dof):
+    """P(X >= statistic) for X ~ chi-square(dof), via the regularized incomplete gamma function."""
+    if dof <= 0:
+        return float('nan')
+    a, x = dof / 2.0, statistic / 2.0
+    if x <= 0:
+        return 1.0
+    log_prefactor = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        # Series for the lower regularized gamma P(a, x)
+        term = total = 1.0 / a
+        n = a
+        for _ in range(10000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefactor))
+    # Lentz's continued fraction for the upper regularized gamma Q(a, x)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1.0 / tiny
+    d = 1.0 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1.0 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefactor) * h)
+
+def _smaller_root(a, b, c):
+    """Root of a*z^2 + b*z + c = 0 with the smaller magnitude, or None when there is no real root."""
+    if abs(a) < 1e-12:
+        return -c / b if abs(b) > 1e-12 else None
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return None
+    root = math.sqrt(discriminant)
+    return min(((-b + root) / (2 * a), (-b - root) / (2 * a)), key=abs)
+
+# Flipping functions of RS analysis: F1 swaps 2k <-> 2k+1, F-1 swaps 2k-1 <-> 2k
+def _flip_positive(values):
+    return values ^ 1
+
+def _flip_negative(values):
+    return ((values + 1) ^ 1) - 1
+
+RS_MASK = np.array([0, 1, 1, 0], dtype=bool)
+
+def calculate_rs_counts(pixels, band_rows=256):
+    """Regular/singular group counts for RS analysis, per channel.
+
+    Pixels are split into horizontal groups of len(RS_MASK); a group is regular when the
+    masked flip increases its smoothness measure (sum of absolute neighbour differences)
+    and singular when it decreases it. Counts are returned as an array of shape (C, 8):
+    R_M, S_M, R_-M, S_-M for the image and then for the image with every LSB flipped.
+    Processed in bands of rows to bound the size of the int16 temporaries.
+    """
+    group = len(RS_MASK)
+    height, width, channels = pixels.shape
+    usable = (width // group) * group
+    counts = np.zeros((channels, 8), dtype=np.int64)
+    for top in range(0, height, band_rows):
+        band = pixels[top:top + band_rows, :usable].astype(np.int16)
+        groups = band.reshape(band.shape[0], usable // group, group, channels)
+        for offset, base in ((0, groups), (4, _flip_positive(groups))):
+            smoothness = np.abs(np.diff(base, axis=2)).sum(axis=2)
+            column = 0
+            for flip in (_flip_positive, _flip_negative):
+                flipped = np.where(RS_MASK[:, None], flip(base), base)
+                flipped_smoothness = np.abs(np.diff(flipped, axis=2)).sum(axis=2)
+                counts[:, offset + column] += (flipped_smoothness > smoothness).sum(axis=(0, 1))
+                counts[:, offset + column + 1] += (flipped_smoothness < smoothness).sum(axis=(0, 1))
+                column += 2
+    return counts
+
+def estimate_rs_payload(counts):
+    """Fridrich-Goljan-Du RS payload estimate from one row of calculate_rs_counts (None if undefined)."""
+    r_m, s_m, r_neg, s_neg, r_m_flip, s_m_flip, r_neg_flip, s_neg_flip = [float(v) for v in counts]
+    d0, d1 = r_m - s_m, r_m_flip - s_m_flip
+    dn0, dn1 = r_neg - s_neg, r_neg_flip - s_neg_flip
+    z = _smaller_root(2 * (d1 + d0), dn0 - dn1 - d1 - 3 * d0, d0 - dn0)
+    if z is None or abs(z - 0.5) < 1e-12:
+        return None
+    return z / (z - 0.5)
+
+def calculate_sample_pair_counts(left, right, band_rows=256):
+    """Per-channel |X|, |Y|, |W + Z| and |P| of Dumitrescu-Wu-Wang sample pair analysis.
+
+    left/right are equally shaped (H, W, C) arrays of horizontally adjacent samples (u, v).
+    X holds pairs with (v even, u < v) or (v odd, u > v), Y the mirrored cases, and W + Z
+    the pairs whose values fall in the same {2k, 2k+1} class. Returns shape (C, 4).
+    """
+    channels = left.shape[-1]
+    counts = np.zeros((channels, 4), dtype=np.int64)
+    for top in range(0, left.shape[0], band_rows):
+        u = left[top:top + band_rows]
+        v = right[top:top + band_rows]
+        v_even = (v & 1) == 0
+        u_less = u < v
+        u_greater = u > v
+        counts[:, 0] += ((v_even & u_less) | (~v_even & u_greater)).sum(axis=(0, 1))
+        counts[:, 1] += ((v_even & u_greater) | (~v_even & u_less)).sum(axis=(0, 1))
+        counts[:, 2] += ((u >> 1) == (v >> 1)).sum(axis=(0, 1))
+        counts[:, 3] += u.shape[0] * u.shape[1]
+    return counts
+
+def estimate_spa_payload(counts):
+    """Sample pair analysis payload estimate from one row of calculate_sample_pair_counts.
+
+    Solves 0.5 |W + Z| p^2 + (2|X| - |P|) p + |Y| - |X| = 0 for the smaller root.
+    """
+    x, y, same_class, total = [float(v) for v in counts]
+    return _smaller_root(0.5 * same_class, 2 * x - total, y - x)
 
-# Add more statistical analysis functions as needed (e.g., entropy calculation)
\ No newline at end of file
+# Add more statistical analysis functions as needed
\ No newline at end of file
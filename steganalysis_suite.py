@@ -1,13 +1,49 @@
 import os
-import imghdr  # Import here
-from image_analyzer import analyze_image
-from file_analyzer import analyze_file
+import argparse
+from dispatcher import analyze_path
+from batch_scanner import run_batch
 from reporting import generate_report
+from classifier import create_batch_scorer
 from config import load_config
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Steganalysis Suite")
+    parser.add_argument("inputs", nargs="*", help="Files, directories or glob patterns to scan in batch mode")
+    parser.add_argument("--manifest", action="append", default=[], help="File listing one path or glob per line")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    parser.add_argument("--max-in-flight", type=int, help="Maximum number of files queued at once")
+    parser.add_argument("--timeout", type=float, help="Per-file timeout in seconds (0 disables)")
+    parser.add_argument("--journal", help="Scan journal recording batch progress (default scan_journal_path)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue the journal's run, skipping files it already completed")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Like --resume, but trust the journal for directories unchanged since the last "
+                             "completed run (no per-file stat; files edited in place are missed)")
+    parser.add_argument("--serve", action="store_true", help="Run as a service with warm workers (see analysis_server)")
+    parser.add_argument("--host", help="Service mode: address to listen on (default server_host)")
+    parser.add_argument("--port", type=int, help="Service mode: TCP port (default server_port)")
+    parser.add_argument("--socket", help="Service mode: listen on this Unix socket instead of TCP")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve:
+        from analysis_server import serve  # Only service mode needs the HTTP stack
+        serve(host=args.host, port=args.port, socket_path=args.socket, workers=args.workers)
+        return
+
     config = load_config()
 
+    if args.inputs or args.manifest:
+        if (args.resume or args.changed_only) and not (args.journal or config.get('scan_journal_path')):
+            print("Error: --resume and --changed-only need --journal or scan_journal_path.")
+            return
+        journal_mode = "changed" if args.changed_only else "resume" if args.resume else "new"
+        run_batch(args.inputs, config, manifests=args.manifest, workers=args.workers,
+                  max_in_flight=args.max_in_flight, timeout=args.timeout,
+                  journal_path=args.journal, journal_mode=journal_mode)
+        return
+
     input_file = input("Enter the path to the file you want to analyze: ")
 
     if not os.path.exists(input_file):
@@ -16,12 +52,15 @@ def main():
 
     print(f"Analyzing: {input_file}")
 
-    if imghdr.what(input_file):
-        analysis_results = analyze_image(input_file, config)
-    else:
-        analysis_results = analyze_file(input_file, config)
+    analysis_results = analyze_path(input_file, config)
+    scorer = create_batch_scorer(config, lambda path, results: None)
+    if scorer:  # A batch of one; scoring updates analysis_results in place
+        scorer.submit(input_file, analysis_results)
+        for member in analysis_results.get("members", []):
+            scorer.submit(member["path"], member)
+        scorer.close()
 
-    generate_report(input_file, analysis_results)
+    generate_report(input_file, analysis_results, config, verbose=True)
     print("Analysis complete. Report generated.")
 
 if __name__ == "__main__":
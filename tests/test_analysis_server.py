@@ -0,0 +1,49 @@
+import os
+
+import batch_scanner
+from analysis_server import AnalysisService
+from config import DEFAULT_CONFIG
+
+class _FixedConfig:
+    """Stands in for ConfigWatcher, so the tests do not depend on a config.json."""
+    def __init__(self, config):
+        self.config = config
+        self.listeners = []
+
+    def current(self):
+        return self.config
+
+def test_dead_worker_is_replaced_once(tmp_path, monkeypatch):
+    for name in ("crash.bin", "ok.bin"):
+        (tmp_path / name).write_bytes(name.encode())
+    original_analyze = batch_scanner.analyze_path
+
+    def crashing_analyze(file_path, config):
+        if file_path.endswith("crash.bin"):
+            os._exit(1)  # Like an OOM kill: no exception, the process is just gone
+        return original_analyze(file_path, config)
+
+    monkeypatch.setattr(batch_scanner, "analyze_path", crashing_analyze)
+    service = AnalysisService(_FixedConfig({**DEFAULT_CONFIG, "default_file_methods": []}), workers=1)
+    try:
+        broken = service.executor
+        shutdowns = []
+        shutdown = broken.shutdown
+        monkeypatch.setattr(broken, "shutdown", lambda **kwargs: shutdowns.append(kwargs) or shutdown(**kwargs))
+        start_pool = service._start_pool
+
+        def unlocked_start_pool():
+            assert not service.lock.locked()  # Status and admission go on while the pool warms up
+            return start_pool()
+
+        monkeypatch.setattr(service, "_start_pool", unlocked_start_pool)
+        assert service.analyze(str(tmp_path / "crash.bin"))[0] == 500
+        replacement = service.executor
+        assert replacement is not broken
+        service._replace_pool(broken)  # A second request that saw the same broken pool
+        assert service.executor is replacement
+        assert shutdowns == [{"wait": False, "cancel_futures": True}]
+        assert service.analyze(str(tmp_path / "ok.bin"))[0] == 200
+        assert service.status()["in_flight"] == 0
+    finally:
+        service.close()
\ No newline at end of file
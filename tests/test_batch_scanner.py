@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+import signal
+import sqlite3
+import pytest
+import batch_scanner
+from batch_scanner import _init_worker, _scan_file, run_batch
+from config import DEFAULT_CONFIG
+
+@pytest.mark.skipif(not hasattr(signal, "SIGALRM"), reason="timeouts need SIGALRM")
+def test_slow_streaming_read_times_out(tmp_path):
+    path = tmp_path / "large.bin"
+    path.write_bytes(bytes(range(256)) * 16384)  # 4 MiB
+    config = {**DEFAULT_CONFIG, "default_file_methods": [], "file_chunk_size": 16}
+    previous = signal.getsignal(signal.SIGALRM)
+    _init_worker()
+    try:
+        outcome = _scan_file(str(path), config, 0.2)
+    finally:
+        signal.signal(signal.SIGALRM, previous)
+    assert outcome["timed_out"]
+    assert outcome["analysis_results"] is None
+
+def test_interrupted_batch_closes_writer_and_discards_uncommitted_rows(tmp_path, monkeypatch):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"data")
+    writers = []
+    original_writer = batch_scanner.BackgroundReportWriter
+
+    def tracking_writer(*args, **kwargs):
+        writers.append(original_writer(*args, **kwargs))
+        return writers[-1]
+
+    def failing_collect(future, file_path, summary, submit, metrics, journal=None):
+        journal.record(future.result())
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(batch_scanner, "BackgroundReportWriter", tracking_writer)
+    monkeypatch.setattr(batch_scanner, "_collect", failing_collect)
+    config = {**DEFAULT_CONFIG, "report_output_dir": str(tmp_path / "reports"), "default_file_methods": []}
+    journal_path = str(tmp_path / "journal.sqlite")
+    with pytest.raises(KeyboardInterrupt):
+        run_batch([str(path)], config, workers=1, journal_path=journal_path)
+    assert not writers[0].thread.is_alive()
+    with sqlite3.connect(journal_path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM files").fetchone()[0] == 0
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="the patched analyzer must reach the workers")
+def test_batch_survives_a_dead_worker(tmp_path, monkeypatch):
+    for name in ("a.bin", "crash.bin", "z.bin"):
+        (tmp_path / name).write_bytes(name.encode())
+    original_analyze = batch_scanner.analyze_path
+
+    def crashing_analyze(file_path, config):
+        if file_path.endswith("crash.bin"):
+            os._exit(1)  # Like an OOM kill: no exception, the process is just gone
+        return original_analyze(file_path, config)
+
+    monkeypatch.setattr(batch_scanner, "analyze_path", crashing_analyze)
+    config = {**DEFAULT_CONFIG, "report_output_dir": str(tmp_path / "reports"), "default_file_methods": []}
+    journal_path = str(tmp_path / "journal.sqlite")
+    summary = run_batch([str(tmp_path / name) for name in ("a.bin", "crash.bin", "z.bin")], config, workers=1,
+                        max_in_flight=1, journal_path=journal_path)
+    assert summary["files"] == 3 and summary["failed"] == 1
+    with sqlite3.connect(journal_path) as connection:
+        statuses = dict(connection.execute("SELECT path, status FROM files"))
+    assert statuses == {str(tmp_path / "a.bin"): "done", str(tmp_path / "crash.bin"): "failed",
+                        str(tmp_path / "z.bin"): "done"}
\ No newline at end of file
@@ -0,0 +1,25 @@
+import zipfile
+
+from config import DEFAULT_CONFIG
+from dispatcher import analyze_path
+
+def _corrupt_first_member(path):
+    with zipfile.ZipFile(path) as archive:
+        info = archive.infolist()[0]
+    with open(path, 'r+b') as f:
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = int.from_bytes(f.read(2), 'little'), int.from_bytes(f.read(2), 'little')
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        f.write(b'\xff' * 16)
+
+def test_unreadable_member_does_not_stop_the_archive(tmp_path):
+    for compression in (zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED):  # zlib.error and bad CRC
+        path = tmp_path / f"archive{compression}.zip"
+        with zipfile.ZipFile(path, 'w', compression) as archive:
+            archive.writestr("broken.txt", b"some text that will be damaged " * 100)
+            archive.writestr("intact.txt", b"plain readable text " * 100)
+        _corrupt_first_member(path)
+        members = analyze_path(str(path), DEFAULT_CONFIG)["members"]
+        assert [member["path"] for member in members] == [f"{path}!broken.txt", f"{path}!intact.txt"]
+        assert "error" in members[0]
+        assert "error" not in members[1] and members[1]["file_type"] == "file"
\ No newline at end of file
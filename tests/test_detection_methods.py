@@ -0,0 +1,34 @@
+import base64
+import random
+
+import pytest
+
+from detection_methods import EntropyProfileStream
+
+def _profile(data, chunk_size):
+    stream = EntropyProfileStream()
+    for offset in range(0, len(data), chunk_size):
+        stream.update(data[offset:offset + chunk_size])
+    return stream.finalize({})
+
+def _structured(size):
+    return (b"<record id='0000'>plain structured text</record>\n" * (size // 50 + 1))[:size]
+
+@pytest.mark.parametrize("chunk_size", [1000, 2048, 1 << 20])
+def test_entropy_profile_does_not_depend_on_chunk_size(chunk_size):
+    data = _structured(150000) + random.Random(0).randbytes(50000) + _structured(150000)
+    result = _profile(data, chunk_size)
+    expected = _profile(data, len(data))
+    assert result["windows"] == expected["windows"] == (len(data) - 4096) // 1024 + 1
+    assert len(result["high_entropy_segments"]) == len(expected["high_entropy_segments"])
+    for segment, expected_segment in zip(result["high_entropy_segments"], expected["high_entropy_segments"]):
+        assert segment == pytest.approx(expected_segment)
+
+def test_random_payload_is_random_like():
+    # Base64 text is just below the high-entropy threshold, so the run's edge windows mix it in
+    rng = random.Random(0)
+    surroundings = base64.b64encode(rng.randbytes(120000))
+    result = _profile(surroundings + rng.randbytes(50000) + surroundings, 65536)
+    longest = max(result["high_entropy_segments"], key=lambda segment: segment["length"])
+    assert longest["random_like"]
+    assert result["suspicion_score"] == 1.0
\ No newline at end of file
@@ -0,0 +1,34 @@
+import numpy as np
+from PIL import Image
+
+from config import DEFAULT_CONFIG
+from file_analyzer import analyze_file
+
+METHODS = ["metadata_analysis", "byte_frequency_analysis", "entropy_profile_analysis", "structure_analysis"]
+
+def _png_with_appended_data(path):
+    Image.fromarray(np.zeros((32, 32), dtype=np.uint8)).save(path)
+    with open(path, 'ab') as f:
+        f.write(b"hidden payload" * 1000)
+
+def test_structure_analysis_short_circuits_before_streaming(tmp_path):
+    path = tmp_path / "appended.png"
+    _png_with_appended_data(path)
+    config = {**DEFAULT_CONFIG, "default_file_methods": METHODS, "short_circuit": True}
+    results = analyze_file(str(path), config)
+    assert list(results["detection_results"]) == ["structure_analysis"]
+    assert results["detection_results"]["structure_analysis"]["suspicion_score"] == 1.0
+    assert sorted(results["skipped_methods"]) == sorted(METHODS[:3])
+    assert results["features"] is None  # The file was never streamed
+
+def test_all_methods_run_without_short_circuit(tmp_path):
+    path = tmp_path / "appended.png"
+    _png_with_appended_data(path)
+    results = analyze_file(str(path), {**DEFAULT_CONFIG, "default_file_methods": METHODS})
+    assert sorted(results["detection_results"]) == sorted(METHODS)
+    assert results["features"]["file_size"] == path.stat().st_size
+    assert "skipped_methods" not in results
+
+def test_missing_file(tmp_path):
+    config = {**DEFAULT_CONFIG, "default_file_methods": METHODS, "short_circuit": True}
+    assert analyze_file(str(tmp_path / "missing.bin"), config) == {}
\ No newline at end of file
@@ -0,0 +1,23 @@
+import numpy as np
+from PIL import Image
+
+from config import DEFAULT_CONFIG
+from dispatcher import analyze_path
+from file_type import sniff_file_type
+
+def test_ppm_is_analyzed_as_an_image(tmp_path):
+    path = tmp_path / "noise.ppm"
+    Image.fromarray(np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)).save(path)
+    assert sniff_file_type(path.read_bytes()[:32]) == ('image', 'ppm')
+    results = analyze_path(str(path), DEFAULT_CONFIG)
+    assert results["detected_type"] == {"category": "image", "format": "ppm"}
+    assert results["file_type"] == "image"
+
+def test_imghdr_formats_are_recognized():
+    assert sniff_file_type(b'P1\n# bitmap\n2 2\n') == ('image', 'pbm')
+    assert sniff_file_type(b'P5 64 64 255\n') == ('image', 'pgm')
+    assert sniff_file_type(b'PK\x03\x04') == ('archive', 'zip')
+    assert sniff_file_type(b'\x59\xa6\x6a\x95' + bytes(28)) == ('image', 'sun_raster')
+    assert sniff_file_type(b'#define test_width 8\n') == ('image', 'xbm')
+    assert sniff_file_type(b'\x01\xda\x00\x01') == ('image', 'sgi')
+    assert sniff_file_type(b'\x76\x2f\x31\x01\x02\x00\x00\x00') == ('image', 'exr')
\ No newline at end of file
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from config import DEFAULT_CONFIG
+from feature_extraction import extract_feature_vector
+from image_analyzer import analyze_image
+from utils import normalize_pixels
+
+# Never flagged, so only the screening detectors run on screened frames
+SCREENING_CONFIG = {**DEFAULT_CONFIG, "screening_max_pixels": 4096, "screening_threshold": 1.1,
+                    "default_image_methods": ["pairs_of_values_analysis", "rs_analysis"]}
+
+def _save_gradient(path):
+    rng = np.random.default_rng(0)
+    gradient = np.add.outer(np.arange(256), np.arange(256)) // 2 + rng.integers(0, 3, (256, 256))
+    Image.fromarray(np.dstack([gradient.astype(np.uint8)] * 3)).save(path)
+
+def test_unflagged_jpeg_skips_full_resolution_detectors(tmp_path):
+    path = tmp_path / "large.jpg"
+    _save_gradient(path)
+    results = analyze_image(str(path), SCREENING_CONFIG)
+    assert results["screening"] == {"scale": 4, "flagged": False, "methods": ["pairs_of_values_analysis"]}
+    assert results["skipped_methods"] == ["rs_analysis"]
+
+def test_formats_without_reduced_decoding_are_not_screened(tmp_path):
+    path = tmp_path / "large.png"
+    _save_gradient(path)
+    results = analyze_image(str(path), SCREENING_CONFIG)
+    assert "screening" not in results
+    assert list(results["detection_results"]) == ["pairs_of_values_analysis", "rs_analysis"]
+
+def test_screened_frame_vector_matches_training(tmp_path):
+    path = tmp_path / "large.jpg"
+    _save_gradient(path)
+    results = analyze_image(str(path), {**SCREENING_CONFIG, "feature_store_path": str(tmp_path / "store")})
+    assert results["screening"]["flagged"] is False
+    with Image.open(path) as img:
+        expected = extract_feature_vector(normalize_pixels(img))  # As classifier training computes it
+    np.testing.assert_array_equal(results["feature_vector"], expected)
+
+def test_bit_plane_artifacts_of_same_named_files_do_not_collide(tmp_path):
+    config = {**DEFAULT_CONFIG, "default_image_methods": ["visual_lsb_analysis"], "bit_plane_artifacts": True,
+              "report_output_dir": str(tmp_path / "reports"), "result_cache_path": str(tmp_path / "cache.sqlite")}
+    paths = []
+    for seed in (1, 2):
+        (tmp_path / str(seed)).mkdir()
+        path = tmp_path / str(seed) / "image.png"
+        Image.fromarray(np.random.default_rng(seed).integers(0, 256, (32, 32), dtype=np.uint8)).save(path)
+        paths.append(str(path))
+    artifacts = [analyze_image(path, config)["detection_results"]["visual_lsb_analysis"]
+                 ["bit_planes"]["channel_0"]["plane_0"]["artifact"] for path in paths]
+    assert artifacts[0] != artifacts[1]
+    for artifact in artifacts:
+        os.remove(artifact)
+    # A cache hit must not report the deleted files
+    result = analyze_image(paths[0], config)["detection_results"]["visual_lsb_analysis"]
+    assert result["bit_planes"]["channel_0"]["plane_0"]["artifact"] == artifacts[0]
+    assert os.path.exists(artifacts[0])
+def test_jpegs_over_dct_max_pixels_skip_the_coefficient_reader(tmp_path):
+    path = tmp_path / "large.jpg"
+    _save_gradient(path)
+    config = {**DEFAULT_CONFIG, "default_image_methods": ["jsteg_analysis"], "screening_max_pixels": None}
+    assert "error" not in analyze_image(str(path), config)["detection_results"]["jsteg_analysis"]
+    result = analyze_image(str(path), {**config, "dct_max_pixels": 4096})["detection_results"]["jsteg_analysis"]
+    assert "over dct_max_pixels" in result["error"]
\ No newline at end of file
@@ -0,0 +1,51 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from jpeg_dct import decode_component, read_dct_coefficients
+
+def _jpeg(pixels, **options):
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'JPEG', **options)
+    buffer.seek(0)
+    return buffer
+
+def _noise(shape):
+    return np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+
+def test_flat_image_has_only_dc_terms():
+    buffer = _jpeg(np.full((24, 40), 160, dtype=np.uint8), quality=50)
+    coefficients = read_dct_coefficients(buffer)
+    with Image.open(buffer) as img:
+        dc_step = img.quantization[0][0]
+    (luminance,) = coefficients.components
+    assert luminance["blocks"].shape == (3, 5, 64)
+    assert (luminance["blocks"][:, :, 0] == round((160 - 128) * 8 / dc_step)).all()
+    assert not luminance["blocks"][:, :, 1:].any()
+
+@pytest.mark.parametrize("options", [{"restart_marker_blocks": 3}, {"restart_marker_rows": 1}, {"optimize": True}])
+def test_restart_markers_and_optimized_tables_give_the_same_coefficients(options):
+    pixels = _noise((61, 83, 3))
+    baseline = read_dct_coefficients(_jpeg(pixels, quality=85, subsampling=2))
+    variant = read_dct_coefficients(_jpeg(pixels, quality=85, subsampling=2, **options))
+    for component, expected in zip(variant.components, baseline.components):
+        np.testing.assert_array_equal(component["blocks"], expected["blocks"])
+
+@pytest.mark.parametrize("subsampling", [0, 1, 2])  # 4:4:4, 4:2:2, 4:2:0
+def test_coefficients_reconstruct_the_decoded_luminance(subsampling):
+    buffer = _jpeg(_noise((61, 83, 3)), quality=90, subsampling=subsampling)
+    coefficients = read_dct_coefficients(buffer)
+    # 4:2:0: 4x6 MCUs of 16x16 pixels, four luminance blocks and one block per chroma plane each
+    if subsampling == 2:
+        assert [component["blocks"].shape[:2] for component in coefficients.components] == [(8, 12), (4, 6), (4, 6)]
+    with Image.open(buffer) as img:
+        img.draft('YCbCr', img.size)  # The decoder's own Y plane, without colour conversion
+        expected = np.asarray(img)[:, :, 0].astype(np.int16)
+    luminance = decode_component(coefficients.components[0])[:61, :83]
+    assert np.abs(luminance - expected).max() <= 2  # libjpeg's integer IDCT rounds differently
+
+def test_progressive_jpeg_is_rejected():
+    with pytest.raises(ValueError, match="progressive"):
+        read_dct_coefficients(_jpeg(_noise((16, 16, 3)), progressive=True))
\ No newline at end of file
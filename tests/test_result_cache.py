@@ -0,0 +1,38 @@
+import sqlite3
+
+import result_cache
+from config import DEFAULT_CONFIG
+from result_cache import ResultCache, config_fingerprint
+
+def test_lookups_and_stores_do_not_hold_the_write_lock(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first, second = ResultCache(path, 1 << 20), ResultCache(path, 1 << 20)
+    first.put("a", {"score": 1})
+    assert first.get("a") == {"score": 1}
+    second.put("b", {"score": 2})  # Would wait on the first worker if it still held a transaction
+    assert second.get("b") == {"score": 2}
+    first.commit()
+    second.commit()
+
+def test_locked_cache_skips_the_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "LOCK_TIMEOUT_SECONDS", 0.05)
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path, 1 << 20)
+    cache.put("a", {"score": 1})
+    assert cache.get("a") == {"score": 1}
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")  # Another worker in the middle of a write
+    try:
+        cache.put("b", {"score": 2})
+        cache.commit()
+        assert cache.get("b") is None
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+    cache.put("b", {"score": 2})
+    assert cache.get("b") == {"score": 2}
+
+def test_output_settings_do_not_change_the_fingerprint():
+    changed = {**DEFAULT_CONFIG, "report_format": "csv", "profiling": True, "metrics_path": "other.prom"}
+    assert config_fingerprint(changed) == config_fingerprint(DEFAULT_CONFIG)
+    assert config_fingerprint({**DEFAULT_CONFIG, "lsb_tile_size": 32}) != config_fingerprint(DEFAULT_CONFIG)
\ No newline at end of file
@@ -0,0 +1,53 @@
+import os
+
+from batch_scanner import iter_input_paths
+from config import DEFAULT_CONFIG
+from scan_journal import ScanJournal
+
+def _outcome(path, analysis_results, error=None, timed_out=False):
+    return {"input_file": str(path), "size": path.stat().st_size, "mtime_ns": path.stat().st_mtime_ns,
+            "analysis_results": analysis_results, "error": error, "timed_out": timed_out}
+
+def test_only_successful_results_are_complete(tmp_path):
+    config = {**DEFAULT_CONFIG, "default_file_methods": ["metadata_analysis"]}
+    journal = ScanJournal(str(tmp_path / "journal.sqlite"), config)
+    paths = []
+    for name in ("done", "empty", "failed", "timed_out"):
+        path = tmp_path / f"{name}.bin"
+        path.write_bytes(name.encode())
+        paths.append(path)
+    results = {"file_type": "file", "detection_results": {"metadata_analysis": {}}}
+    journal.record(_outcome(paths[0], results))
+    journal.record(_outcome(paths[1], {}))
+    journal.record(_outcome(paths[2], None, error="boom"))
+    journal.record(_outcome(paths[3], None, error="Timed out", timed_out=True))
+    journal.commit()
+    assert [journal.is_complete(str(path)) for path in paths] == [True, False, False, False]
+    journal.close()
+
+def test_changed_mode_rescans_unfinished_and_unrecorded_files(tmp_path, monkeypatch):
+    config = {**DEFAULT_CONFIG, "default_file_methods": ["metadata_analysis"]}
+    directory = tmp_path / "inputs"
+    directory.mkdir()
+    paths = [directory / name for name in ("done.bin", "failed.bin", "unrecorded.bin")]
+    for path in paths:
+        path.write_bytes(path.name.encode())
+    journal = ScanJournal(str(tmp_path / "journal.sqlite"), config)
+    journal.start("run")
+    assert list(iter_input_paths([str(directory)], journal=journal)) == [str(path) for path in paths]
+    journal.record(_outcome(paths[0], {"file_type": "file", "detection_results": {"metadata_analysis": {}}}))
+    journal.record(_outcome(paths[1], None, error="boom"))
+    # unrecorded.bin: its worker died before the outcome was recorded
+    journal.finish()
+    journal.close()
+
+    stats = []
+    original_stat = os.stat
+    monkeypatch.setattr(os, "stat", lambda path, *args, **kwargs: stats.append(str(path)) or
+                        original_stat(path, *args, **kwargs))
+    journal = ScanJournal(str(tmp_path / "journal.sqlite"), config, "changed")
+    remaining = [path for path in iter_input_paths([str(directory)], journal=journal)
+                 if not journal.is_complete(path)]
+    journal.close()
+    assert remaining == [str(paths[1]), str(paths[2])]
+    assert str(paths[0]) not in stats  # Trusted from the unchanged directory, not stat'ed
\ No newline at end of file
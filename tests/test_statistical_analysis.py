@@ -0,0 +1,61 @@
+import math
+
+import numpy as np
+import pytest
+
+from statistical_analysis import (calculate_channel_histograms, calculate_pairs_of_values_chi_square,
+                                  calculate_rs_counts, calculate_sample_pair_counts, chi_square_survival,
+                                  estimate_rs_payload, estimate_spa_payload)
+
+def _cover():
+    """Smooth synthetic scene with mild sensor noise, on which RS and SPA are nearly unbiased."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:256, 0:256]
+    scene = 96 + 48 * np.sin(x / 23.0) + 40 * np.cos(y / 31.0) + rng.normal(0, 1, (256, 256))
+    return np.clip(np.rint(scene), 0, 255).astype(np.uint8)[:, :, np.newaxis]
+
+def _embed(pixels, rate):
+    """LSB replacement of random message bits into a random fraction rate of the samples."""
+    rng = np.random.default_rng(1)
+    carriers = rng.random(pixels.shape) < rate
+    bits = rng.integers(0, 2, pixels.shape, dtype=np.uint8)
+    return np.where(carriers, (pixels & 0xFE) | bits, pixels)
+
+def test_channel_histograms_count_each_channel():
+    pixels = np.random.default_rng(2).integers(0, 256, (31, 17, 4), dtype=np.uint8)
+    expected = [np.bincount(pixels[:, :, channel].ravel(), minlength=256) for channel in range(4)]
+    np.testing.assert_array_equal(calculate_channel_histograms(pixels), expected)
+    np.testing.assert_array_equal(calculate_channel_histograms(pixels[:, :, 1]), expected[1:2])
+
+@pytest.mark.parametrize("rate", [0.0, 0.1, 0.5])
+def test_rs_and_spa_estimate_the_embedding_rate(rate):
+    pixels = _embed(_cover(), rate)
+    rs = estimate_rs_payload(calculate_rs_counts(pixels)[0])
+    spa = estimate_spa_payload(calculate_sample_pair_counts(pixels[:, :-1], pixels[:, 1:])[0])
+    assert rs == pytest.approx(rate, abs=0.03)
+    assert spa == pytest.approx(rate, abs=0.03)
+
+def test_counts_do_not_depend_on_the_band_size():
+    pixels = _embed(_cover(), 0.5)
+    np.testing.assert_array_equal(calculate_rs_counts(pixels, band_rows=7), calculate_rs_counts(pixels))
+    left, right = pixels[:, :-1], pixels[:, 1:]
+    np.testing.assert_array_equal(calculate_sample_pair_counts(left, right, band_rows=7),
+                                  calculate_sample_pair_counts(left, right))
+
+def test_pairs_of_values_detects_full_embedding():
+    cover = _cover() // 3 * 3  # Posterized, so each value pair holds one value only
+    for rate, significant in ((0.0, True), (0.5, True), (1.0, False)):
+        chi2, dof = calculate_pairs_of_values_chi_square(calculate_channel_histograms(_embed(cover, rate)), 4)
+        # A low chi-square (high survival) means the pairs were equalized by embedding
+        assert (chi_square_survival(float(chi2[0]), int(dof[0])) > 0.5) != significant
+
+@pytest.mark.parametrize("statistic, dof, expected", [
+    (3.841, 1, 0.05), (6.635, 1, 0.01), (0.0158, 1, 0.90), (2.558, 10, 0.99), (18.307, 10, 0.05),
+    (293.248, 255, 0.05)])
+def test_chi_square_survival_matches_tables(statistic, dof, expected):
+    assert chi_square_survival(statistic, dof) == pytest.approx(expected, abs=1e-4)
+
+def test_chi_square_survival_edge_cases():
+    assert chi_square_survival(0.0, 5) == 1.0
+    assert math.isnan(chi_square_survival(1.0, 0))
+    assert chi_square_survival(10000.0, 255) == 0.0
\ No newline at end of file
@@ -0,0 +1,19 @@
+import numpy as np
+from PIL import Image
+
+from utils import normalize_pixels
+
+def test_16_bit_grayscale_keeps_its_low_byte(tmp_path):
+    path = tmp_path / "gray16.png"
+    samples = np.random.default_rng(0).integers(0, 65536, (32, 48), dtype=np.uint16)
+    Image.fromarray(samples).save(path)  # uint16 arrays become mode I;16
+    with Image.open(path) as img:
+        assert img.mode in ("I;16", "I")
+        pixels = normalize_pixels(img)
+    assert pixels.shape == (32, 48, 1) and pixels.dtype == np.uint8
+    np.testing.assert_array_equal(pixels[:, :, 0], samples & 0xFF)
+
+def test_float_samples_are_rounded_before_taking_the_low_byte():
+    samples = np.array([[0.4, 255.6, 1000.0]], dtype=np.float32)
+    pixels = normalize_pixels(Image.fromarray(samples))  # float32 arrays become mode F
+    np.testing.assert_array_equal(pixels[:, :, 0], [[0, 0, 1000 & 0xFF]])
\ No newline at end of file
@@ -1,6 +1,68 @@
+import numpy as np
+from PIL import ImageSequence
+
 # Add any common utility functions here
 def byte_to_bits(byte):
     """Converts a byte to its 8-bit binary string representation."""
     return format(byte, '08b')
 
+# PIL modes that are converted before analysis; everything else is already 8 bits per channel,
+# except the wide integer and float modes (I, I;16*, F), which keep their low byte (see normalize_pixels)
+_MODE_CONVERSIONS = {
+    "1": "L",
+    "PA": "RGBA",
+    "YCbCr": "RGB",
+    "LAB": "RGB",
+    "HSV": "RGB",
+}
+
+def normalize_pixels(image):
+    """Decodes a PIL image once into a read-only, channel-last uint8 array of shape (H, W, C).
+
+    16-bit, 32-bit and float samples keep their low byte: convert("L") would clip them to
+    255 and erase the LSB plane the detectors test.
+    """
+    mode = image.mode
+    if mode == "P":
+        target = "RGBA" if "transparency" in image.info else "RGB"
+    else:
+        target = _MODE_CONVERSIONS.get(mode, mode)
+    if target != mode:
+        image = image.convert(target)
+    pixels = np.asarray(image)
+    if pixels.dtype.kind == 'f':
+        pixels = np.rint(pixels).astype(np.int64)
+    if pixels.dtype != np.uint8:
+        pixels = (pixels & 0xFF).astype(np.uint8)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, np.newaxis]
+    pixels = np.ascontiguousarray(pixels)
+    pixels.flags.writeable = False
+    return pixels
+
+def iter_pixel_bands(image, band_height, pixels=None):
+    """Yields (top, band) pairs of horizontal bands of normalized pixels.
+
+    Slices the shared buffer when one is given; otherwise crops the PIL image band
+    by band so the full normalized array is never built.
+    """
+    height = pixels.shape[0] if pixels is not None else image.size[1]
+    for top in range(0, height, band_height):
+        bottom = min(height, top + band_height)
+        if pixels is not None:
+            yield top, pixels[top:bottom]
+        else:
+            yield top, normalize_pixels(image.crop((0, top, image.size[0], bottom)))
+
+def iter_frames(image, max_frames=None):
+    """Lazily yields (index, frame) for every frame of an animated GIF, multi-page TIFF, etc.
+
+    The same Image object is seeked to each frame in turn, so only one frame is decoded
+    at a time; single-frame images yield once.
+    """
+    for index, frame in enumerate(ImageSequence.Iterator(image)):
+        if max_frames is not None and index >= max_frames:
+            break
+        yield index, frame
+
 # Example of a potential utility function
\ No newline at end of file